@@ -0,0 +1,153 @@
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+
+
+DEFAULT_JOBS = 4
+MAX_LINE_WIDTH = 0.5
+
+
+class Cardinality:
+    def __init__(self, parents, avg, p99):
+        self.parents = parents
+        self.avg = avg
+        self.p99 = p99
+
+    @classmethod
+    def from_histogram(cls, histogram, parents=None):
+        """
+        `histogram` maps children count to number of parent rows having that many children.
+        Parents missing from it (`parents` minus those counted) have no children.
+        """
+        histogram = dict(histogram)
+        referenced = sum(histogram.values())
+        if parents is None or parents < referenced:
+            parents = referenced
+        if parents > referenced:
+            histogram[0] = histogram.get(0, 0) + parents - referenced
+        children = sum(n * rows for n, rows in histogram.items())
+        rank = max(0, math.ceil(parents * 0.99) - 1)
+        p99 = 0
+        seen = 0
+        for n in sorted(histogram):
+            p99 = n
+            seen += histogram[n]
+            if seen > rank:
+                break
+        return cls(parents, children / parents if parents else 0.0, p99)
+
+
+def is_measurable(rel):
+    # one-to-one is 1 by definition, many-to-many has no column in start table
+    return rel['start_label'] == 'n' and rel['end_label'] == '1' and bool(rel.get('start_column'))
+
+
+def get_histogram_query(connection, db_table, column, sample=None):
+    """
+    Number of parent rows per children count, counting only referenced parents.
+    With `sample`, only that many child rows are looked at.
+    """
+    qn = connection.ops.quote_name
+    source = '{} WHERE {} IS NOT NULL'.format(qn(db_table), qn(column))
+    if sample:
+        source = '(SELECT {col} FROM {source} LIMIT {limit}) sampled'.format(
+            col=qn(column), source=source, limit=int(sample))
+    return 'SELECT n, COUNT(*) FROM (SELECT COUNT(*) AS n FROM {} GROUP BY {}) counts GROUP BY n'.format(
+        source, qn(column))
+
+
+def measure_relation(db_table, column, parent_table=None, sample=None, using='default'):
+    """
+    Children per parent row, parents without children included when `parent_table` is given.
+    Sampled measures only cover parents referenced by the sampled child rows.
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute(get_histogram_query(connection, db_table, column, sample))
+        histogram = dict(cursor.fetchall())
+        parents = None
+        if parent_table and not sample:
+            cursor.execute('SELECT COUNT(*) FROM {}'.format(connection.ops.quote_name(parent_table)))
+            parents = cursor.fetchone()[0]
+    return Cardinality.from_histogram(histogram, parents)
+
+
+class ThreadConnections:
+    """
+    Database connections opened by pool threads, to be closed once the pool is done.
+    Connections are per thread, each is shared with the closing thread when first seen.
+    """
+    def __init__(self, using):
+        self.using = using
+        self.lock = threading.Lock()
+        self.connections = []
+
+    def get(self):
+        connection = connections[self.using]
+        with self.lock:
+            if connection not in self.connections:
+                connection.inc_thread_sharing()
+                self.connections.append(connection)
+        return connection
+
+    def close_all(self):
+        for connection in self.connections:
+            connection.close()
+            connection.dec_thread_sharing()
+        self.connections = []
+
+
+def measure_cardinality(tables, rels, sample=None, jobs=DEFAULT_JOBS, using='default'):
+    """
+    Children count histogram and parent row count of every foreign key relation,
+    computed by the database, queries run concurrently in `jobs` threads
+    (each with its own database connection). Returns {relation id: Cardinality}.
+    Tables not present in the database (abstract models, unapplied migrations) are skipped.
+    """
+    existing = set(connections[using].introspection.table_names())
+    db_tables = {t['id']: t.get('db_table') for t in tables}
+    targets = [
+        (
+            r['id'], db_tables[r['start_obj_id']], r['start_column'],
+            db_tables[r['end_obj_id']] if db_tables[r['end_obj_id']] in existing else None,
+        )
+        for r in rels
+        if is_measurable(r) and db_tables[r['start_obj_id']] in existing
+    ]
+    pool_connections = ThreadConnections(using)
+
+    def measure(target):
+        pool_connections.get()
+        _, db_table, column, parent_table = target
+        return measure_relation(db_table, column, parent_table, sample=sample, using=using)
+
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(measure, targets))
+    finally:
+        pool_connections.close_all()
+    return {target[0]: result for target, result in zip(targets, results)}
+
+
+def apply_cardinality(rels, measures):
+    max_avg = max((m.avg for m in measures.values()), default=0)
+    for r in rels:
+        m = measures.get(r['id'])
+        if m is None:
+            continue
+        r['start_label'] = '{} (avg {:.1f}, p99 {})'.format(r['start_label'], m.avg, m.p99)
+        if max_avg > 1:
+            r['line_width'] = 0.1 + (MAX_LINE_WIDTH - 0.1) * math.log(max(m.avg, 1)) / math.log(max_avg)
+
+
+def report_lines(tables, rels, measures):
+    by_id = {t['id']: t for t in tables}
+    measured = [r for r in rels if r['id'] in measures]
+    for r in sorted(measured, key=lambda r: -measures[r['id']].p99):
+        m = measures[r['id']]
+        yield '{}.{} -> {}: {} parents, avg {:.1f}, p99 {}'.format(
+            by_id[r['start_obj_id']]['label'], r.get('start_field_name') or '',
+            by_id[r['end_obj_id']]['label'], m.parents, m.avg, m.p99,
+        )
@@ -0,0 +1,168 @@
+from collections import deque
+
+from django.db import connections
+
+
+CASCADE = 'CASCADE'
+UPDATE_ACTIONS = {'SET_NULL', 'SET_DEFAULT', 'SET'}
+BLOCK_ACTIONS = {'PROTECT', 'RESTRICT'}
+
+ROOT_COLOR = 'E04040'
+DELETED_COLOR = 'FF9090'
+UPDATED_COLOR = 'FFE080'
+PROTECTED_COLOR = '90B0FF'
+UNAFFECTED_COLOR = 'E0E0E0'
+CASCADE_RELATION_COLOR = 'D00000'
+
+
+class CascadeResult:
+    def __init__(self, root):
+        self.root = root
+        self.depth = {root: 0}  # deleted table id -> cascade depth
+        self.via = {}  # deleted table id -> relation it was reached through
+        self.parents_only = set()  # tables losing only parent rows of deleted multi-table children
+        self.updated = []  # relations whose rows are updated by deletion
+        self.protected = []  # relations which block deletion
+        self.estimated_rows = None  # table id -> estimated rows deleted per root row
+
+
+def is_parent_link(rel):
+    return rel['end_label'] == 'multi-table'
+
+
+def get_reverse_adjacency(tables, rels):
+    """
+    table id -> list of (table id affected by its deletion, relation, is step from child to parent)
+    """
+    adjacency = {t['id']: [] for t in tables}
+    for r in rels:
+        if not r.get('on_delete'):
+            continue
+        adjacency[r['end_obj_id']].append((r['start_obj_id'], r, False))
+        if is_parent_link(r):
+            # deleting child row deletes its parent row too
+            adjacency[r['start_obj_id']].append((r['end_obj_id'], r, True))
+    return adjacency
+
+
+def is_followed(result, node, r, parent_step):
+    # parent row deleted with its child doesn't take rows of other subclasses
+    return parent_step or node not in result.parents_only or not is_parent_link(r)
+
+
+def analyze_cascade(tables, rels, root, row_counts=None):
+    adjacency = get_reverse_adjacency(tables, rels)
+    result = CascadeResult(root)
+    order = [root]
+    queue = deque([(root, False)])
+
+    while queue:
+        node, links_only = queue.popleft()
+        for affected, r, parent_step in adjacency[node]:
+            if not is_followed(result, node, r, parent_step):
+                continue
+            if links_only and (parent_step or not is_parent_link(r)):
+                continue
+            action = r['on_delete']
+            if action == CASCADE:
+                if affected not in result.depth:
+                    result.depth[affected] = result.depth[node] + 1
+                    result.via[affected] = r
+                    if parent_step:
+                        result.parents_only.add(affected)
+                    order.append(affected)
+                    queue.append((affected, False))
+                elif affected in result.parents_only and not parent_step:
+                    # reached as a whole table after all, its subclasses go too
+                    result.parents_only.discard(affected)
+                    queue.append((affected, True))
+            elif action in UPDATE_ACTIONS:
+                result.updated.append(r)
+            elif action in BLOCK_ACTIONS:
+                result.protected.append(r)
+
+    if row_counts is not None:
+        result.estimated_rows = estimate_rows(result, order, adjacency, row_counts)
+    return result
+
+
+def estimate_rows(result, order, adjacency, row_counts):
+    """
+    Rows deleted per one root row: every cascade step multiplies
+    by average number of children per parent row, child to parent step by one.
+    """
+    estimated = {result.root: 1.0}
+    for node in order:
+        for affected, r, parent_step in adjacency[node]:
+            if r['on_delete'] != CASCADE or result.depth.get(affected, -1) <= result.depth[node]:
+                continue
+            if not is_followed(result, node, r, parent_step):
+                continue
+            if parent_step:
+                ratio = 1.0
+            else:
+                parents = row_counts.get(node) or 0
+                children = row_counts.get(affected) or 0
+                ratio = children / parents if parents else 0.0
+            estimated[affected] = estimated.get(affected, 0.0) + estimated[node] * ratio
+    return estimated
+
+
+def get_row_counts(tables, using='default'):
+    """
+    {table id: row count}, tables not present in the database
+    (abstract models, unapplied migrations) are skipped.
+    """
+    connection = connections[using]
+    existing = set(connection.introspection.table_names())
+    result = {}
+    with connection.cursor() as cursor:
+        for t in tables:
+            if t.get('db_table') not in existing:
+                continue
+            cursor.execute('SELECT COUNT(*) FROM {}'.format(connection.ops.quote_name(t['db_table'])))
+            result[t['id']] = cursor.fetchone()[0]
+    return result
+
+
+def apply_cascade_colors(tables, rels, result):
+    updated = {r['start_obj_id'] for r in result.updated}
+    protected = {r['start_obj_id'] for r in result.protected}
+    for t in tables:
+        if t['id'] == result.root:
+            t['color'] = ROOT_COLOR
+        elif t['id'] in result.depth:
+            t['color'] = DELETED_COLOR
+        elif t['id'] in protected:
+            t['color'] = PROTECTED_COLOR
+        elif t['id'] in updated:
+            t['color'] = UPDATED_COLOR
+        else:
+            t['color'] = UNAFFECTED_COLOR
+    for r in result.via.values():
+        r['color'] = CASCADE_RELATION_COLOR
+
+
+def report_lines(result, tables):
+    by_id = {t['id']: t for t in tables}
+
+    def describe(r):
+        return '{}.{} -> {}'.format(
+            by_id[r['start_obj_id']]['label'], r.get('start_field_name') or '', by_id[r['end_obj_id']]['label'])
+
+    yield 'Deleting {} deletes rows of {} model(s):'.format(by_id[result.root]['label'], len(result.depth) - 1)
+    for table_id in sorted(result.depth, key=lambda i: (result.depth[i], by_id[i]['label'])):
+        if table_id == result.root:
+            continue
+        line = '{:>4} {}'.format(result.depth[table_id], by_id[table_id]['label'])
+        if result.estimated_rows is not None:
+            line += ' (~{:.1f} rows)'.format(result.estimated_rows.get(table_id, 0.0))
+        yield line
+    if result.updated:
+        yield 'Updated on delete:'
+        for r in result.updated:
+            yield '  {} ({})'.format(describe(r), r['on_delete'])
+    if result.protected:
+        yield 'Blocking deletion:'
+        for r in result.protected:
+            yield '  {} ({})'.format(describe(r), r['on_delete'])
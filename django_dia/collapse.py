@@ -0,0 +1,129 @@
+from collections import Counter
+from itertools import count, cycle
+
+from .diagram import PORT_ORDER
+
+
+SUMMARY_COLOR = 'C6D8F0'
+TOP_TABLES = 5
+MAX_LINE_WIDTH = 0.5
+
+
+def get_collapsed_apps(tables, collapse=(), collapse_all_except=()):
+    apps = {t['app_label'] for t in tables}
+    if collapse_all_except:
+        return apps - set(collapse_all_except)
+    return apps & set(collapse)
+
+
+def make_summary_row(name, comment=''):
+    return {
+        'name': name,
+        'type': '',
+        'comment': comment,
+        'primary_key': False,
+        'nullable': False,
+        'unique': False,
+    }
+
+
+def make_summary_table(obj_id, app_label, app_tables, degree, internal_rels):
+    top = sorted(app_tables, key=lambda t: (-degree[t['id']], t['name']))[:TOP_TABLES]
+    rows = [make_summary_row('{} models'.format(len(app_tables)))]
+    if internal_rels:
+        rows.append(make_summary_row('{} internal relations'.format(internal_rels)))
+    rows.extend(
+        make_summary_row(t['name'], '{} relations'.format(degree[t['id']]))
+        for t in top
+    )
+    return {
+        'id': obj_id,
+        'pos': min(t['pos'] for t in app_tables),
+        'name': '[{}]'.format(app_label),
+        'label': app_label,
+        'app_label': app_label,
+        'db_table': None,
+        'fields': rows,
+        'color': SUMMARY_COLOR,
+    }
+
+
+def collapse_apps(tables, rels, collapsed):
+    """
+    Replace tables of `collapsed` applications with one summary node per application,
+    relations touching them are merged into weighted edges.
+    """
+    if not collapsed:
+        return tables, rels
+
+    id_to_app = {t['id']: t['app_label'] for t in tables}
+    obj_num = count(max([t['id'] for t in tables] + [r['id'] for r in rels], default=-1) + 1)
+
+    def get_node(obj_id):
+        app = id_to_app[obj_id]
+        return ('app', app) if app in collapsed else ('table', obj_id)
+
+    degree = Counter()
+    internal = Counter()
+    edges = {}
+    result_rels = []
+    # single pass: merge every relation touching a collapsed app into an edge keyed by node pair
+    for r in rels:
+        start = get_node(r['start_obj_id'])
+        end = get_node(r['end_obj_id'])
+        degree[r['start_obj_id']] += 1
+        degree[r['end_obj_id']] += 1
+        if start[0] == 'table' and end[0] == 'table':
+            result_rels.append(r)
+        elif start == end:
+            internal[start[1]] += 1
+        elif (start, end) in edges:
+            edges[(start, end)]['weight'] += 1
+        else:
+            edges[(start, end)] = {'weight': 1, 'rel': r}
+
+    summary_ids = {}
+    result_tables = []
+    app_tables = {}
+    for t in tables:
+        if t['app_label'] in collapsed:
+            app_tables.setdefault(t['app_label'], []).append(t)
+        else:
+            result_tables.append(t)
+    for app in sorted(app_tables):
+        summary = make_summary_table(next(obj_num), app, app_tables[app], degree, internal[app])
+        summary_ids[app] = summary['id']
+        result_tables.append(summary)
+
+    max_weight = max((e['weight'] for e in edges.values()), default=1)
+    ports = {app: cycle(PORT_ORDER) for app in summary_ids}
+
+    def get_endpoint(node, obj_id, port):
+        if node[0] == 'app':
+            return summary_ids[node[1]], next(ports[node[1]])
+        return obj_id, port
+
+    for (start, end), edge in edges.items():
+        r = edge['rel']
+        start_id, start_port = get_endpoint(start, r['start_obj_id'], r['start_port'])
+        end_id, end_port = get_endpoint(end, r['end_obj_id'], r['end_port'])
+        result_rels.append({
+            'id': next(obj_num),
+            'through_table': None,
+            'start_field_name': None,
+            'start_column': None,
+            'nullable': False,
+            'on_delete': None,
+            'start_obj_id': start_id,
+            'end_obj_id': end_id,
+            'start_port': start_port,
+            'end_port': end_port,
+            'start_label': '',
+            'end_label': 'x{}'.format(edge['weight']) if edge['weight'] > 1 else r['end_label'],
+            'dotted': r['dotted'] and edge['weight'] == 1,
+            'directional': True,
+            'color': '000000',
+            'line_width': 0.1 + (MAX_LINE_WIDTH - 0.1) * (edge['weight'] - 1) / max(max_weight - 1, 1),
+        })
+
+    return result_tables, result_rels
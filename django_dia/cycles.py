@@ -0,0 +1,106 @@
+from .graph import get_dependency_adjacency, strongly_connected_components
+
+
+CYCLE_COLOR = 'FFB0B0'
+CYCLE_RELATION_COLOR = 'D00000'
+DEFERRED_RELATION_COLOR = 'E08000'
+
+
+class CycleAnalysis:
+    def __init__(self):
+        self.load_order = []  # table ids, dependencies first
+        self.cycles = []  # lists of table ids
+        self.deferred = []  # nullable foreign keys to fill after all rows are loaded
+        self.unbreakable = []  # cycles having no nullable foreign key to break them
+        self.cycle_relations = []
+
+
+def order_component(component, internal):
+    """
+    Kahn's topological sort of a single component over non-deferred relations.
+    Returns (order, is_acyclic).
+    """
+    deps = {n: 0 for n in component}
+    dependants = {n: [] for n in component}
+    for node, succ in internal:
+        deps[node] += 1
+        dependants[succ].append(node)
+
+    ready = [n for n in component if deps[n] == 0]
+    order = []
+    while ready:
+        node = ready.pop()
+        order.append(node)
+        for d in dependants[node]:
+            deps[d] -= 1
+            if deps[d] == 0:
+                ready.append(d)
+
+    if len(order) < len(component):
+        placed = set(order)
+        order.extend(n for n in component if n not in placed)
+        return order, False
+    return order, True
+
+
+def analyze_cycles(tables, rels):
+    adjacency = get_dependency_adjacency(tables, rels)
+    result = CycleAnalysis()
+
+    # components come dependencies first, which is already a valid load order
+    for component in strongly_connected_components(adjacency):
+        members = set(component)
+        internal = [
+            (node, succ, r)
+            for node in component
+            for succ, r in adjacency[node]
+            if succ in members
+        ]
+        if not internal:
+            result.load_order.extend(component)
+            continue
+
+        result.cycles.append(component)
+        result.cycle_relations.extend(r for _, _, r in internal)
+        result.deferred.extend(r for _, _, r in internal if r['nullable'])
+        order, acyclic = order_component(
+            component, [(node, succ) for node, succ, r in internal if not r['nullable']])
+        if not acyclic:
+            result.unbreakable.append(component)
+        result.load_order.extend(order)
+
+    return result
+
+
+def apply_cycle_highlight(tables, rels, analysis):
+    in_cycle = {n for c in analysis.cycles for n in c}
+    for t in tables:
+        if t['id'] in in_cycle:
+            t['color'] = CYCLE_COLOR
+    for r in analysis.cycle_relations:
+        r['color'] = CYCLE_RELATION_COLOR
+    for r in analysis.deferred:
+        r['color'] = DEFERRED_RELATION_COLOR
+
+
+def report_lines(analysis, tables):
+    by_id = {t['id']: t for t in tables}
+    cycle_of = {n: i for i, c in enumerate(analysis.cycles, 1) for n in c}
+
+    yield 'Load order:'
+    for i, table_id in enumerate(analysis.load_order, 1):
+        suffix = ' (cycle {})'.format(cycle_of[table_id]) if table_id in cycle_of else ''
+        yield '{:>6}. {}{}'.format(i, by_id[table_id]['label'], suffix)
+
+    yield 'Cycles: {}'.format(len(analysis.cycles))
+    for i, cycle in enumerate(analysis.cycles, 1):
+        yield '  {}: {}'.format(i, ', '.join(sorted(by_id[n]['label'] for n in cycle)))
+
+    yield 'Deferred foreign keys (load as NULL, update afterwards):'
+    for r in analysis.deferred:
+        yield '  {}.{} -> {}'.format(
+            by_id[r['start_obj_id']]['label'], r['start_field_name'], by_id[r['end_obj_id']]['label'])
+
+    for cycle in analysis.unbreakable:
+        yield 'Cycle without nullable foreign key, needs deferred constraints: {}'.format(
+            ', '.join(sorted(by_id[n]['label'] for n in cycle)))
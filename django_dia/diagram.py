@@ -2,7 +2,6 @@ import pkgutil
 import random
 import xml.etree.ElementTree as ET
 from itertools import count, cycle
-from functools import partial
 
 from . import utils
 
@@ -31,91 +30,262 @@ def get_field_port(field_idx):
     return 12 + field_idx * 2
 
 
-def get_rand_color():
-    r = int(random.random() * 80) + 175
-    g = int(random.random() * 80) + 175
-    b = int(random.random() * 80) + 175
+def get_rng(seed=None):
+    if isinstance(seed, random.Random):
+        return seed
+    return random.Random(seed)
+
+
+def get_rand_color(rng):
+    r = int(rng.random() * 80) + 175
+    g = int(rng.random() * 80) + 175
+    b = int(rng.random() * 80) + 175
     return (hex(r)[-2:] + hex(g)[-2:] + hex(b)[-2:]).upper()
 
 
 class ModelColors:
-    def __init__(self):
+    def __init__(self, rng):
+        self.rng = rng
         self.colors = {}
 
     def get(self, model):
         label = utils.get_model_applabel(model)
         if label not in self.colors:
-            self.colors[label] = get_rand_color()
+            self.colors[label] = get_rand_color(self.rng)
         return self.colors[label]
 
 
-def get_port_index(field, mdata):
-    if field is None or field.primary_key:
-        return next(mdata['ports'])
-    return get_field_port(mdata['field_to_index'][field.name])
+class TableRef:
+    """
+    All the relations pass needs of a finished table.
+    """
+    __slots__ = ('id', 'field_to_index', 'ports')
+
+    def __init__(self, obj_id, fields):
+        self.id = obj_id
+        self.field_to_index = {f['name']: i for i, f in enumerate(fields)}
+        self.ports = cycle(PORT_ORDER)
+
+
+def get_port_index(field, ref):
+    if field is None or field.primary_key or field.name not in ref.field_to_index:
+        # primary key or no column of its own (many-to-many), any port will do
+        return next(ref.ports)
+    return get_field_port(ref.field_to_index[field.name])
 
 
-def prepare_relation_stage2(model_to_mdata, obj_num, rel):
-    start_rec = model_to_mdata[rel['start_obj']]
-    end_rec = model_to_mdata[rel['end_obj']]
+# model classes and Field objects, not kept in prepared relations
+RELATION_OBJECT_KEYS = ('start_obj', 'end_obj', 'start_field', 'end_field')
+
+
+def prepare_relation_stage2(obj_num, start_ref, end_ref, rel):
+    start_field = rel.get('start_field', None)
+    end_field = rel.get('end_field', None)
+    rel = {k: v for k, v in rel.items() if k not in RELATION_OBJECT_KEYS}
     rel.update({
         'id': next(obj_num),
-        'start_obj_id': start_rec['id'],
-        'end_obj_id': end_rec['id'],
-        'start_port': get_port_index(rel.get('start_field', None), start_rec),
-        'end_port': get_port_index(rel.get('end_field', None), end_rec),
+        'through_table': None if start_field is None else utils.get_relation_through_table(start_field),
+        'start_field_name': None if start_field is None else start_field.name,
+        'start_column': None if start_field is None else start_field.column,
+        'nullable': False if start_field is None else start_field.null,
+        'start_obj_id': start_ref.id,
+        'end_obj_id': end_ref.id,
+        'start_port': get_port_index(start_field, start_ref),
+        'end_port': get_port_index(end_field, end_ref),
     })
     return rel
 
 
-def prepare_data(model_list, inheritance=False):
-    model_colors = ModelColors()
-    obj_num = count()
-    model_data = []
-    model_to_mdata = {}
-
-    for model in model_list:
-        mdata = {
-            'id': next(obj_num),
-            'pos': (random.random() * 80, random.random() * 80),
-            'name': utils.get_model_name(model),
-            'fields': utils.prepare_model_fields(model),
-            'color': model_colors.get(model),
-            'ports': cycle(PORT_ORDER),
-        }
-        mdata['field_to_index'] = {f['name']: i for i, f in enumerate(mdata['fields'])}
-        model_to_mdata[model] = mdata
-        model_data.append(mdata)
-
-    rel_stage2 = partial(prepare_relation_stage2, model_to_mdata, obj_num)
-    rel_data = []
-
-    for model in model_list:
-        for rel in utils.prepare_model_relations(model):
-            try:
-                rel_data.append(rel_stage2(rel))
-            except KeyError:
-                pass
-        if inheritance:
-            for rel in utils.prepare_model_inheritance(model):
-                try:
-                    rel_data.append(rel_stage2(rel))
-                except KeyError:
-                    pass
-
-    for mdata in model_data:
-        del mdata['ports']
-        del mdata['field_to_index']
-    for rel in rel_data:
-        del rel['start_obj']
-        del rel['end_obj']
-        rel.pop('start_field', None)
-        rel.pop('end_field', None)
+MISSING_DROP = 'drop'
+MISSING_REPORT = 'report'  # dropped too, caller lists them
+MISSING_STUB = 'stub'
+STUB_COLOR = 'E0E0E0'
+
+
+def make_stub(obj_id, pos, label):
+    """
+    Lightweight table for relation target outside of the diagram.
+    """
+    app_label, name = label.split('.', 1)
+    return {
+        'id': obj_id,
+        'pos': pos,
+        'name': name,
+        'label': label,
+        'app_label': app_label,
+        'db_table': None,
+        'fields': [],
+        'indexes': [],
+        'color': STUB_COLOR,
+        'stub': True,
+    }
+
+
+def describe_dropped(start_label, rel, target):
+    return {
+        'start': start_label,
+        'field': None if rel.get('start_field') is None else rel['start_field'].name,
+        'target': target,
+        'end_label': rel['end_label'],
+    }
+
+
+def sort_models(model_list):
+    return sorted(model_list, key=utils.get_model_label)
+
+
+INTROSPECTION = {
+    'fields': utils.prepare_model_fields,
+    'indexes': utils.prepare_model_indexes,
+    'relations': utils.prepare_model_relations,
+    'inheritance': utils.prepare_model_inheritance,
+}
+
+
+class ModelData(dict):
+    """
+    Introspection results of a model, every part is computed on first access.
+    """
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def __missing__(self, key):
+        value = self[key] = INTROSPECTION[key](self.model)
+        return value
+
+
+class ModelDataCache:
+    """
+    Keeps introspection results of models between prepare_data calls.
+    Keyed by model class, so re-created classes (e.g. of another migration state) are introspected again.
+    """
+    def __init__(self):
+        self.data = {}
+
+    def get(self, model):
+        if model not in self.data:
+            self.data[model] = ModelData(model)
+        return self.data[model]
+
+    def prune(self, model_list):
+        keep = set(model_list)
+        self.data = {m: d for m, d in self.data.items() if m in keep}
+
+
+class NoCache:
+    """
+    Introspects models anew on every access and keeps nothing.
+    """
+    def get(self, model):
+        return ModelData(model)
+
+
+class DataPipeline:
+    """
+    Prepares data in two passes over models, holding only a TableRef per table in between:
+    tables() assigns ids and yields finished tables one at a time,
+    relations() then yields relations resolved against table references by label.
+    tables() has to be exhausted before relations() is started.
+
+    Without `cache` every model is introspected once per pass and nothing is kept,
+    so memory doesn't grow with the number of models beyond the references.
+    """
+    def __init__(self, model_list, inheritance=False, seed=None, cache=None, missing=MISSING_DROP):
+        self.model_list = sort_models(model_list)
+        self.inheritance = inheritance
+        self.cache = NoCache() if cache is None else cache
+        self.missing = missing
+        self.rng = get_rng(seed)
+        self.obj_num = count()
+        # model names are case insensitive in lazy references
+        self.refs = {}  # lowercase label -> TableRef
+
+    def get_random_pos(self):
+        return (self.rng.random() * 80, self.rng.random() * 80)
+
+    def iter_model_relations(self, model):
+        """
+        Relations of a model paired with label of their target, lazy string references included.
+        """
+        data = self.cache.get(model)
+        rels = data['relations'] + data['inheritance'] if self.inheritance else data['relations']
+        for rel in rels:
+            yield rel, utils.get_reference_label(rel['end_obj'], model)
+
+    def tables(self):
+        model_colors = ModelColors(self.rng)
+        for model in self.model_list:
+            data = self.cache.get(model)
+            table = {
+                'id': next(self.obj_num),
+                'pos': self.get_random_pos(),
+                'name': utils.get_model_name(model),
+                'label': utils.get_model_label(model),
+                'app_label': utils.get_model_applabel(model),
+                'db_table': utils.get_model_db_table(model),
+                'concrete': utils.is_model_concrete(model),
+                'fields': [dict(f) for f in data['fields']],
+                'indexes': [dict(i) for i in data['indexes']],
+                'color': model_colors.get(model),
+            }
+            self.refs[table['label'].lower()] = TableRef(table['id'], table['fields'])
+            yield table
+
+        if self.missing == MISSING_STUB:
+            unresolved = {}
+            for model in self.model_list:
+                for _, target in self.iter_model_relations(model):
+                    if target.lower() not in self.refs:
+                        unresolved.setdefault(target.lower(), target)
+            for key in sorted(unresolved):
+                stub = make_stub(next(self.obj_num), self.get_random_pos(), unresolved[key])
+                self.refs[key] = TableRef(stub['id'], stub['fields'])
+                yield stub
+
+    def relations(self, dropped=None):
+        """
+        Relations to models outside of the diagram are skipped,
+        and described in `dropped` list if one is given.
+        """
+        for model in self.model_list:
+            label = utils.get_model_label(model)
+            start_ref = self.refs[label.lower()]
+            for rel, target in self.iter_model_relations(model):
+                end_ref = self.refs.get(target.lower())
+                if end_ref is None:
+                    if dropped is not None:
+                        dropped.append(describe_dropped(label, rel, target))
+                    continue
+                yield prepare_relation_stage2(self.obj_num, start_ref, end_ref, rel)
+
+
+def prepare_data(model_list, inheritance=False, seed=None, cache=None, missing=MISSING_DROP, dropped=None):
+    """
+    `seed` is either a value for random.Random or a random.Random instance.
+    Same models and same seed produce the same data.
+    Relations to models outside of `model_list` are dropped, with `missing=MISSING_STUB`
+    their targets are drawn as stub tables instead.
+    Dropped relations are described in `dropped` list if one is given.
+    """
+    pipeline = DataPipeline(
+        model_list, inheritance=inheritance, seed=seed,
+        cache=ModelDataCache() if cache is None else cache, missing=missing,
+    )
+    tables = list(pipeline.tables())
+    rels = list(pipeline.relations(dropped=dropped))
 
     # at this point all data is JSON-serializable
     # and contains no objects
 
-    return model_data, rel_data
+    return tables, rels
+
+
+def dropped_report_lines(dropped):
+    for d in dropped:
+        yield '{}{} -> {} ({}): target not in diagram'.format(
+            d['start'], '.' + d['field'] if d['field'] else '', d['target'], d['end_label'])
+    yield 'Dropped relations: {}'.format(len(dropped))
 
 
 # XML generation ===========
@@ -189,7 +359,11 @@ def xml_make_table(data):
     obj.extend([
         make_dia_attribute('elem_corner', 'point', data['pos']),
         make_dia_attribute('name', 'string', data['name']),
-        make_dia_attribute('visible_comment', 'boolean', False),
+    ])
+    if data.get('comment'):
+        obj.append(make_dia_attribute('comment', 'string', data['comment']))
+    obj.extend([
+        make_dia_attribute('visible_comment', 'boolean', bool(data.get('comment'))),
         make_dia_attribute('tagging_comment', 'boolean', False),
         make_dia_attribute('underline_primary_key', 'boolean', True),
         make_dia_attribute('bold_primary_keys', 'boolean', False),
@@ -214,6 +388,24 @@ def xml_make_table(data):
     return obj
 
 
+# Dia line styles: 0 - solid, 1 - dashed, 2 - dash-dot, 3 - dash-dot-dot, 4 - dotted
+ON_DELETE_LINE_STYLES = {
+    'CASCADE': '0',
+    'SET_NULL': '1',
+    'SET_DEFAULT': '1',
+    'SET': '1',
+    'PROTECT': '2',
+    'RESTRICT': '2',
+    'DO_NOTHING': '3',
+}
+
+
+def get_line_style(data):
+    if data['dotted']:
+        return '4'
+    return ON_DELETE_LINE_STYLES.get(data.get('on_delete'), '0')
+
+
 def xml_make_relation(data, bezier=False):
     rel = ET.Element('dia:object', attrib={
         'type': 'Standard - BezierLine' if bezier else 'Database - Reference',
@@ -221,7 +413,7 @@ def xml_make_relation(data, bezier=False):
         'id': 'O{}'.format(data['id']),
     })
 
-    line_style = '4' if data['dotted'] else '0'
+    line_style = get_line_style(data)
     if bezier:
         rel.append(make_dia_attribute('line_style', 'enum', line_style))
         attr = ET.SubElement(rel, 'dia:attribute', attrib={'name': 'corner_types'})
@@ -264,7 +456,7 @@ def xml_make_relation(data, bezier=False):
         make_dia_attribute('end_arrow_length', 'real', 0.25),
         make_dia_attribute('end_arrow_width', 'real', 0.25),
         make_dia_attribute('line_colour', 'color', data['color']),
-        make_dia_attribute('line_width', 'real', 0.1),
+        make_dia_attribute('line_width', 'real', data.get('line_width', 0.1)),
     ])
 
     return rel
@@ -274,16 +466,85 @@ def get_empty_xml():
     return pkgutil.get_data(__package__, 'empty.xml')
 
 
-def dia_xml(tables, rels, bezier=False):
+CROSS_APP_LAYER = 'Cross-app relations'
+
+
+def make_layer(name, visible=True, active=False):
+    return ET.Element('dia:layer', attrib={
+        'name': name,
+        'visible': 'true' if visible else 'false',
+        'active': 'true' if active else 'false',
+    })
+
+
+def fill_layers_by_app(dom, tables, rels, bezier=False, visible_apps=None):
+    dom.remove(dom.find('dia:layer', namespaces=XML_NAMESPACES))
+
+    id_to_app = {t['id']: t['app_label'] for t in tables}
+    layers = {}
+
+    def get_layer(name, visible):
+        if name not in layers:
+            layers[name] = make_layer(name, visible=visible, active=not layers)
+            dom.append(layers[name])
+        return layers[name]
+
+    for t in sorted(tables, key=lambda t: t['app_label']):
+        app = t['app_label']
+        get_layer(app, visible_apps is None or app in visible_apps).append(xml_make_table(t))
+    for r in rels:
+        start_app = id_to_app[r['start_obj_id']]
+        if start_app == id_to_app[r['end_obj_id']]:
+            layer = layers[start_app]
+        else:
+            layer = get_layer(CROSS_APP_LAYER, True)
+        layer.append(xml_make_relation(r, bezier=bezier))
+
+
+XML_DECLARATION = u'<?xml version="1.0" encoding="UTF-8"?>'.encode('utf-8')
+STREAM_MARKER = 'dia:stream-marker'
+
+
+def iter_dia_xml(tables, rels, bezier=False):
+    """
+    Single layer diagram as chunks of bytes, every object is serialized as soon as it's taken
+    from `tables` and `rels` iterables. Output is the same as of dia_xml.
+    """
     dom = ET.fromstring(get_empty_xml())
-    layer = dom.find('dia:layer', namespaces=XML_NAMESPACES)
+    dom.find('dia:layer', namespaces=XML_NAMESPACES).append(ET.Element(STREAM_MARKER))
+    head, tail = ET.tostring(dom, encoding='utf-8').split(ET.tostring(ET.Element(STREAM_MARKER), encoding='utf-8'))
 
+    yield XML_DECLARATION + head
     for t in tables:
-        layer.append(xml_make_table(t))
+        yield ET.tostring(xml_make_table(t), encoding='utf-8')
     for r in rels:
-        layer.append(xml_make_relation(r, bezier=bezier))
+        yield ET.tostring(xml_make_relation(r, bezier=bezier), encoding='utf-8')
+    yield tail
 
-    return (
-        u'<?xml version="1.0" encoding="UTF-8"?>'.encode('utf-8') +
-        ET.tostring(dom, encoding='utf-8')
-    )
+
+def dia_xml(tables, rels, bezier=False, layers_by_app=False, visible_apps=None):
+    if not layers_by_app:
+        return b''.join(iter_dia_xml(tables, rels, bezier=bezier))
+
+    dom = ET.fromstring(get_empty_xml())
+    fill_layers_by_app(dom, tables, rels, bezier=bezier, visible_apps=visible_apps)
+    return XML_DECLARATION + ET.tostring(dom, encoding='utf-8')
+
+
+def stream_diagram(model_list, seed=None, inheritance=False, missing=MISSING_DROP, dropped=None, bezier=False):
+    """
+    Single layer diagram as chunks of bytes, models are introspected and written one by one.
+    Output is the same as of render_diagram.
+    """
+    pipeline = DataPipeline(model_list, inheritance=inheritance, seed=seed, missing=missing)
+    return iter_dia_xml(pipeline.tables(), pipeline.relations(dropped=dropped), bezier=bezier)
+
+
+def render_diagram(model_list, seed=None, inheritance=False, **kwargs):
+    """
+    Reentrant entry point: all randomness comes from `seed`,
+    so same input produces byte-identical output in any thread.
+    Keyword arguments are passed to dia_xml.
+    """
+    tables, rels = prepare_data(model_list, inheritance=inheritance, seed=seed)
+    return dia_xml(tables, rels, **kwargs)
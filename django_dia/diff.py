@@ -0,0 +1,146 @@
+import hashlib
+import json
+from itertools import count
+
+from .diagram import PORT_ORDER, get_field_port
+
+
+ADDED_COLOR = 'A6E3A1'
+REMOVED_COLOR = 'F4A6A6'
+MODIFIED_COLOR = 'F9E2AF'
+CONTEXT_COLOR = 'DDDDDD'
+
+
+def dump_graph(tables, rels):
+    return json.dumps({'tables': tables, 'relations': rels}, default=str, sort_keys=True)
+
+
+def load_graph(filename):
+    with open(filename) as f:
+        data = json.load(f)
+    return data['tables'], data['relations']
+
+
+class Graph:
+    def __init__(self, tables, rels):
+        self.tables = tables
+        self.rels = rels
+        self.by_id = {t['id']: t for t in tables}
+        self.by_label = {t['label']: t for t in tables}
+        self.outgoing = {t['label']: [] for t in tables}
+        self.neighbours = {t['label']: set() for t in tables}
+        for r in rels:
+            start = self.by_id[r['start_obj_id']]['label']
+            end = self.by_id[r['end_obj_id']]['label']
+            self.outgoing[start].append(r)
+            self.neighbours[start].add(end)
+            self.neighbours[end].add(start)
+        self.hashes = {t['label']: self.get_table_hash(t) for t in tables}
+
+    def get_relation_signature(self, rel):
+        return [
+            self.by_id[rel['end_obj_id']]['label'],
+            rel['start_label'],
+            rel['end_label'],
+            rel['dotted'],
+            rel.get('on_delete'),
+        ]
+
+    def get_table_hash(self, table):
+        signature = {
+            'name': table['name'],
+            'db_table': table.get('db_table'),
+            'fields': table['fields'],
+            'indexes': table.get('indexes') or [],
+            'relations': sorted(
+                (self.get_relation_signature(r) for r in self.outgoing[table['label']]),
+                key=lambda s: json.dumps(s, default=str),
+            ),
+        }
+        return hashlib.sha1(
+            json.dumps(signature, default=str, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+
+
+class SchemaDiff:
+    def __init__(self, added, removed, modified):
+        self.added = added
+        self.removed = removed
+        self.modified = modified
+
+    def is_empty(self):
+        return not (self.added or self.removed or self.modified)
+
+    def summary_lines(self):
+        yield 'Added: {}, removed: {}, modified: {}'.format(
+            len(self.added), len(self.removed), len(self.modified))
+        for prefix, labels in (('+', self.added), ('-', self.removed), ('~', self.modified)):
+            for label in labels:
+                yield '{} {}'.format(prefix, label)
+
+
+def diff_graphs(old, new):
+    added = sorted(label for label in new.hashes if label not in old.hashes)
+    removed = sorted(label for label in old.hashes if label not in new.hashes)
+    modified = sorted(
+        label for label, h in new.hashes.items()
+        if label in old.hashes and old.hashes[label] != h
+    )
+    return SchemaDiff(added, removed, modified)
+
+
+def fix_port(port, table):
+    # port may point to a field row which doesn't exist in the other version of the table
+    if port >= get_field_port(len(table['fields'])):
+        return PORT_ORDER[0]
+    return port
+
+
+def make_diff_data(old, new, schema_diff):
+    colors = {}
+    for label in schema_diff.added:
+        colors[label] = ADDED_COLOR
+    for label in schema_diff.removed:
+        colors[label] = REMOVED_COLOR
+    for label in schema_diff.modified:
+        colors[label] = MODIFIED_COLOR
+
+    changed = set(colors)
+    for label in schema_diff.added + schema_diff.modified:
+        for n in new.neighbours[label]:
+            colors.setdefault(n, CONTEXT_COLOR)
+    for label in schema_diff.removed + schema_diff.modified:
+        for n in old.neighbours[label]:
+            colors.setdefault(n, CONTEXT_COLOR)
+
+    obj_num = count()
+    tables = []
+    label_to_table = {}
+    for label in sorted(colors):
+        source = new.by_label.get(label) or old.by_label[label]
+        t = dict(source, id=next(obj_num), color=colors[label])
+        label_to_table[label] = t
+        tables.append(t)
+
+    rels = []
+    for graph in (new, old):
+        for r in graph.rels:
+            start = graph.by_id[r['start_obj_id']]['label']
+            end = graph.by_id[r['end_obj_id']]['label']
+            if start not in changed and end not in changed:
+                continue
+            # relations of kept tables are taken from the new graph only
+            if graph is old and start in new.by_label and end in new.by_label:
+                continue
+            start_table = label_to_table[start]
+            end_table = label_to_table[end]
+            rels.append(dict(
+                r,
+                id=next(obj_num),
+                start_obj_id=start_table['id'],
+                end_obj_id=end_table['id'],
+                start_port=fix_port(r['start_port'], start_table),
+                end_port=fix_port(r['end_port'], end_table),
+            ))
+
+    return tables, rels
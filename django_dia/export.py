@@ -0,0 +1,159 @@
+import xml.etree.ElementTree as ET
+from array import array
+
+from .graph import build_csr
+
+
+KIND_FOREIGN_KEY = 'foreign_key'
+KIND_ONE_TO_ONE = 'one_to_one'
+KIND_MANY_TO_MANY = 'many_to_many'
+KIND_GENERIC = 'generic'
+# inheritance relations use their end label: multi-table, abstract or proxy
+
+FORMAT_GRAPHML = 'graphml'
+FORMAT_EDGELIST = 'edgelist'
+
+NODE_ATTRIBUTES = ('label', 'app_label', 'db_table')
+EDGE_ATTRIBUTES = ('kind', 'nullable', 'field', 'start_label', 'end_label')
+
+
+def get_relation_kind(rel):
+    start, end = rel['start_label'], rel['end_label']
+    if start == '1' and end == '1':
+        return KIND_ONE_TO_ONE
+    if start == 'n' and end == '1':
+        return KIND_FOREIGN_KEY
+    if start == 'n' and end == 'n':
+        return KIND_GENERIC if rel['dotted'] else KIND_MANY_TO_MANY
+    return end
+
+
+class GraphArrays:
+    """
+    Tables and relations as compressed sparse row adjacency.
+    Node i is `ids[i]`, its outgoing relations are edges indptr[i]:indptr[i + 1],
+    edge e goes to node indices[e]. Attribute lists are indexed by node or edge number.
+    """
+    def __init__(self, ids, indptr, indices, nodes, edges):
+        self.ids = ids
+        self.indptr = indptr
+        self.indices = indices
+        self.nodes = nodes  # attribute name -> list per node
+        self.edges = edges  # attribute name -> list per edge
+
+    @property
+    def sources(self):
+        result = array('l', [0]) * len(self.indices)
+        for i in range(len(self.ids)):
+            for e in range(self.indptr[i], self.indptr[i + 1]):
+                result[e] = i
+        return result
+
+    def iter_edges(self):
+        for i in range(len(self.ids)):
+            for e in range(self.indptr[i], self.indptr[i + 1]):
+                yield e, i, self.indices[e]
+
+    def as_numpy(self):
+        """
+        Same arrays converted to NumPy: int64 index arrays, bool nullable, object string attributes.
+        Requires numpy to be installed.
+        """
+        import numpy as np
+
+        def convert(name, values):
+            if name == 'nullable':
+                return np.array([bool(v) for v in values], dtype=bool)
+            return np.array(values, dtype=object)
+
+        return GraphArrays(
+            np.array(self.ids, dtype=np.int64),
+            np.frombuffer(self.indptr, dtype=self.indptr.typecode).astype(np.int64),
+            np.frombuffer(self.indices, dtype=self.indices.typecode).astype(np.int64),
+            {name: convert(name, values) for name, values in self.nodes.items()},
+            {name: convert(name, values) for name, values in self.edges.items()},
+        )
+
+
+def to_csr(tables, rels):
+    ids, id_to_index, indptr, indices = build_csr(
+        tables, [(r['start_obj_id'], r['end_obj_id']) for r in rels])
+
+    # build_csr fills edges of every node in input order, place attributes the same way
+    fill = list(indptr[:-1])
+    order = [0] * len(rels)
+    for n, r in enumerate(rels):
+        a = id_to_index[r['start_obj_id']]
+        order[fill[a]] = n
+        fill[a] += 1
+    ordered = [rels[n] for n in order]
+
+    return GraphArrays(
+        ids, indptr, indices,
+        {name: [t.get(name) for t in tables] for name in NODE_ATTRIBUTES},
+        {
+            'kind': [get_relation_kind(r) for r in ordered],
+            'nullable': [bool(r.get('nullable')) for r in ordered],
+            'field': [r.get('start_field_name') for r in ordered],
+            'start_label': [r['start_label'] for r in ordered],
+            'end_label': [r['end_label'] for r in ordered],
+        },
+    )
+
+
+def graphml(graph):
+    ns = 'http://graphml.graphdrawing.org/xmlns'
+    root = ET.Element('graphml', xmlns=ns)
+    for name in NODE_ATTRIBUTES:
+        ET.SubElement(root, 'key', {'id': 'n_' + name, 'for': 'node', 'attr.name': name, 'attr.type': 'string'})
+    for name in EDGE_ATTRIBUTES:
+        ET.SubElement(root, 'key', {
+            'id': 'e_' + name, 'for': 'edge', 'attr.name': name,
+            'attr.type': 'boolean' if name == 'nullable' else 'string',
+        })
+    g = ET.SubElement(root, 'graph', id='G', edgedefault='directed')
+
+    def add_data(element, prefix, attributes, index):
+        for name, values in attributes.items():
+            value = values[index]
+            if value is None:
+                continue
+            if isinstance(value, bool):
+                value = 'true' if value else 'false'
+            ET.SubElement(element, 'data', key=prefix + name).text = str(value)
+
+    for i, obj_id in enumerate(graph.ids):
+        add_data(ET.SubElement(g, 'node', id='n{}'.format(obj_id)), 'n_', graph.nodes, i)
+    for e, a, b in graph.iter_edges():
+        edge = ET.SubElement(g, 'edge', {
+            'id': 'e{}'.format(e),
+            'source': 'n{}'.format(graph.ids[a]),
+            'target': 'n{}'.format(graph.ids[b]),
+        })
+        add_data(edge, 'e_', graph.edges, e)
+    return ET.tostring(root, encoding='utf-8')
+
+
+def edge_list(graph):
+    """
+    Tab separated: start label, end label, kind, nullable, field name.
+    """
+    labels = graph.nodes['label']
+    lines = []
+    for e, a, b in graph.iter_edges():
+        lines.append('\t'.join((
+            labels[a], labels[b], graph.edges['kind'][e],
+            '1' if graph.edges['nullable'][e] else '0', graph.edges['field'][e] or '',
+        )))
+    return ''.join(line + '\n' for line in lines).encode('utf-8')
+
+
+def get_format(filename):
+    return FORMAT_GRAPHML if filename.endswith('.graphml') else FORMAT_EDGELIST
+
+
+def export_graph(tables, rels, fmt=FORMAT_GRAPHML):
+    graph = to_csr(tables, rels)
+    if fmt == FORMAT_GRAPHML:
+        return graphml(graph)
+    return edge_list(graph)
@@ -0,0 +1,122 @@
+from array import array
+from itertools import accumulate
+
+
+def is_dependency(rel):
+    """
+    Relation which requires end table row to exist before start table row:
+    foreign key, one-to-one or multi-table inheritance.
+    """
+    if rel['end_label'] == 'multi-table':
+        return True
+    return not rel['dotted'] and rel['end_label'] == '1'
+
+
+def get_dependency_adjacency(tables, rels):
+    """
+    table id -> list of (dependency table id, relation)
+    """
+    adjacency = {t['id']: [] for t in tables}
+    for r in rels:
+        if is_dependency(r):
+            adjacency[r['start_obj_id']].append((r['end_obj_id'], r))
+    return adjacency
+
+
+def strongly_connected_components(adjacency):
+    """
+    Iterative Tarjan's algorithm, O(nodes + edges).
+    `adjacency` maps node -> list of (successor, payload).
+    Components are returned in reverse topological order: every component
+    comes after all components it has edges to.
+    """
+    index = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    result = []
+    counter = 0
+
+    for root in adjacency:
+        if root in index:
+            continue
+        work = [(root, iter(adjacency[root]))]
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+
+        while work:
+            node, successors = work[-1]
+            for succ, _ in successors:
+                if succ not in index:
+                    index[succ] = lowlink[succ] = counter
+                    counter += 1
+                    stack.append(succ)
+                    on_stack.add(succ)
+                    work.append((succ, iter(adjacency[succ])))
+                    break
+                if succ in on_stack:
+                    lowlink[node] = min(lowlink[node], index[succ])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    result.append(component)
+
+    return result
+
+
+def build_csr(tables, edges):
+    """
+    Compressed sparse row adjacency over table ids.
+    `edges` is iterable of (start id, end id).
+    Returns (ids, id_to_index, indptr, indices), successors of node i are indices[indptr[i]:indptr[i + 1]].
+    """
+    ids = [t['id'] for t in tables]
+    id_to_index = {obj_id: i for i, obj_id in enumerate(ids)}
+    counts = [0] * (len(ids) + 1)
+    pairs = [(id_to_index[a], id_to_index[b]) for a, b in edges]
+    for a, _ in pairs:
+        counts[a + 1] += 1
+    indptr = array('l', accumulate(counts))
+    indices = array('l', [0]) * len(pairs)
+    fill = array('l', indptr[:-1])
+    for a, b in pairs:
+        indices[fill[a]] = b
+        fill[a] += 1
+    return ids, id_to_index, indptr, indices
+
+
+def bfs(indptr, indices, sources):
+    """
+    Multi-source breadth-first search.
+    Returns (distance, parent) lists, -1 for unreachable nodes and for sources' parents.
+    """
+    n = len(indptr) - 1
+    distance = [-1] * n
+    parent = [-1] * n
+    frontier = list(sources)
+    for s in frontier:
+        distance[s] = 0
+    depth = 0
+    while frontier:
+        depth += 1
+        next_frontier = []
+        for node in frontier:
+            for succ in indices[indptr[node]:indptr[node + 1]]:
+                if distance[succ] < 0:
+                    distance[succ] = depth
+                    parent[succ] = node
+                    next_frontier.append(succ)
+        frontier = next_frontier
+    return distance, parent
@@ -0,0 +1,72 @@
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.state import ProjectState
+
+from . import diagram, utils
+
+
+def get_loader():
+    # reads migration files only, no database connection is needed
+    return MigrationLoader(None, ignore_no_migrations=True)
+
+
+def parse_migration_target(loader, target):
+    """
+    `app:0042` -> ('app', '0042_migration_name')
+    """
+    if ':' not in target:
+        raise ValueError('Migration should be given as app_label:migration_name, got {}'.format(target))
+    app_label, prefix = target.split(':', 1)
+    return app_label, loader.get_migration_by_prefix(app_label, prefix).name
+
+
+def get_full_plan(loader):
+    plan = []
+    seen = set()
+    for leaf in sorted(loader.graph.leaf_nodes()):
+        for node in loader.graph.forwards_plan(leaf):
+            if node not in seen:
+                seen.add(node)
+                plan.append(node)
+    return plan
+
+
+def iter_states(loader, plan):
+    """
+    Apply migrations of `plan` one by one to the same state.
+    Once rendered, state re-renders only models touched by each migration,
+    unchanged model classes stay the same objects.
+    """
+    state = ProjectState(real_apps=loader.unmigrated_apps)
+    for node in plan:
+        state = loader.graph.nodes[node].mutate_state(state, preserve=False)
+        yield node, state
+
+
+def get_state_models(state, app_labels=None, exclude_models=()):
+    return [
+        m for m in state.apps.get_models()
+        if (app_labels is None or utils.get_model_applabel(m) in app_labels)
+        and utils.get_model_label(m) not in exclude_models
+    ]
+
+
+def prepare_data_at(loader, node, app_labels=None, exclude_models=(), **kwargs):
+    state = loader.project_state(node, at_end=True)
+    return diagram.prepare_data(get_state_models(state, app_labels, exclude_models), **kwargs)
+
+
+def iter_history_data(loader, app_labels=None, exclude_models=(), dropped=None, **kwargs):
+    """
+    Yields (node, (tables, relations)) after every migration of `app_labels`.
+    Introspection results of models not changed by a migration are reused.
+    `dropped` list, if given, is refilled with relations dropped at each yielded node.
+    """
+    cache = diagram.ModelDataCache()
+    for node, state in iter_states(loader, get_full_plan(loader)):
+        if app_labels is not None and node[0] not in app_labels:
+            continue
+        models = get_state_models(state, app_labels, exclude_models)
+        cache.prune(models)
+        if dropped is not None:
+            del dropped[:]
+        yield node, diagram.prepare_data(models, cache=cache, dropped=dropped, **kwargs)
@@ -0,0 +1,37 @@
+import json
+import pkgutil
+
+from .layout import get_table_size
+
+
+DATA_PLACEHOLDER = '/*DATA*/'
+
+
+def get_viewer_template():
+    return pkgutil.get_data(__package__, 'viewer.html').decode('utf-8')
+
+
+def compact_table(t):
+    w, h = get_table_size(t)
+    return [
+        t['id'], round(t['pos'][0], 2), round(t['pos'][1], 2), w, h,
+        t['name'], t['color'],
+        [[f['name'], f['type'], int(f['primary_key'])] for f in t['fields']],
+    ]
+
+
+def compact_relation(r):
+    return [
+        r['start_obj_id'], r['end_obj_id'], r['color'], int(r['dotted']),
+        r['start_label'], r['end_label'],
+    ]
+
+
+def html_page(tables, rels):
+    data = json.dumps({
+        'tables': [compact_table(t) for t in tables],
+        'relations': [compact_relation(r) for r in rels],
+    }, separators=(',', ':'), default=str)
+    # keep </script> inside names from closing the script element
+    data = data.replace('</', '<\\/')
+    return get_viewer_template().replace(DATA_PLACEHOLDER, data, 1).encode('utf-8')
@@ -0,0 +1,94 @@
+KIND_PREFIXES = {
+    'primary_key': 'PK',
+    'unique': 'UQ',
+    'unique_together': 'UQ',
+    'constraint': 'UQ',
+    'index': 'IX',
+    'db_index': 'IX',
+}
+
+DUPLICATE = 'duplicate'
+PREFIX = 'prefix'
+
+REDUNDANT_MARK = '!'
+REDUNDANT_COLOR = 'FFC080'
+
+
+class Finding:
+    def __init__(self, table, index, covering, reason):
+        self.table = table
+        self.index = index  # redundant index
+        self.covering = covering  # index making it redundant
+        self.reason = reason  # DUPLICATE or PREFIX
+
+
+def describe_index(index):
+    text = '{} ({})'.format(KIND_PREFIXES.get(index['kind'], 'IX'), ', '.join(index['columns']))
+    if index['name']:
+        text += ' ' + index['name']
+    if index['partial']:
+        text += ' partial'
+    return text
+
+
+def find_covering(indexes, position):
+    """
+    Index which makes indexes[position] unnecessary, if any.
+    Unique index is only replaced by an earlier unique index on the same columns,
+    plain index by an index on the same columns or starting with them.
+    """
+    index = indexes[position]
+    columns = index['columns']
+    candidates = [
+        (i, other) for i, other in enumerate(indexes)
+        if i != position and not other['partial'] and other['columns'][:len(columns)] == columns
+    ]
+    for i, other in candidates:
+        if len(other['columns']) == len(columns) and (other['unique'] or not index['unique']) and (
+                i < position or other['unique'] and not index['unique']):
+            return other, DUPLICATE
+    if index['unique']:
+        return None, None
+    for i, other in candidates:
+        if len(other['columns']) > len(columns):
+            return other, PREFIX
+    return None, None
+
+
+def audit_redundant_indexes(tables):
+    findings = []
+    for t in tables:
+        indexes = t.get('indexes') or []
+        for position, index in enumerate(indexes):
+            if index['partial'] or not index['columns']:
+                continue
+            covering, reason = find_covering(indexes, position)
+            if covering is not None:
+                findings.append(Finding(t, index, covering, reason))
+    return findings
+
+
+def apply_index_comments(tables, findings=()):
+    """
+    List indexes in table comment, redundant ones are marked and their tables highlighted.
+    """
+    redundant = {id(f.index) for f in findings}
+    for t in tables:
+        lines = []
+        for index in t.get('indexes') or []:
+            mark = REDUNDANT_MARK + ' ' if id(index) in redundant else ''
+            lines.append(mark + describe_index(index))
+        if lines:
+            t['comment'] = '\n'.join(lines)
+        if any(id(index) in redundant for index in t.get('indexes') or []):
+            t['color'] = REDUNDANT_COLOR
+
+
+def report_lines(findings):
+    for f in findings:
+        yield '{}: {} is {} of {}'.format(
+            f.table['label'], describe_index(f.index),
+            'a duplicate' if f.reason == DUPLICATE else 'a prefix',
+            describe_index(f.covering),
+        )
+    yield 'Redundant indexes: {}'.format(len(findings))
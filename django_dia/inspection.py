@@ -0,0 +1,128 @@
+"""
+Streaming inspector for .dia files.
+
+Can be used without django:
+    python -m django_dia.inspection scheme.dia
+"""
+
+import gzip
+import sys
+import xml.etree.ElementTree as ET
+
+
+DIA_NS = '{http://www.lysator.liu.se/~alla/dia/}'
+
+TABLE_TYPE = 'Database - Table'
+
+
+class DiagramReport:
+    def __init__(self):
+        self.tables = 0
+        self.fields = 0
+        self.relations = 0
+        self.other_objects = 0
+        self.ids = set()
+        self.duplicate_ids = []
+        self.connection_targets = set()
+
+    @property
+    def dangling_connections(self):
+        return sorted(self.connection_targets - self.ids)
+
+    @property
+    def is_valid(self):
+        return not self.duplicate_ids and not self.dangling_connections
+
+    def summary_lines(self):
+        yield 'Tables: {}'.format(self.tables)
+        yield 'Fields: {}'.format(self.fields)
+        yield 'Relations: {}'.format(self.relations)
+        if self.other_objects:
+            yield 'Other objects: {}'.format(self.other_objects)
+        for obj_id in self.duplicate_ids:
+            yield 'Duplicate id: {}'.format(obj_id)
+        for obj_id in self.dangling_connections:
+            yield 'Dangling connection to: {}'.format(obj_id)
+
+
+def open_diagram(filename):
+    with open(filename, 'rb') as f:
+        magic = f.read(2)
+    if magic == b'\x1f\x8b':
+        return gzip.open(filename, 'rb')
+    return open(filename, 'rb')
+
+
+def get_attribute(obj, name):
+    for attr in obj.iterfind(DIA_NS + 'attribute'):
+        if attr.get('name') == name:
+            return attr
+    return None
+
+
+def get_table_info(obj):
+    name = get_attribute(obj, 'name')
+    if name is not None:
+        name = name.findtext(DIA_NS + 'string', '').strip('#')
+    pos = get_attribute(obj, 'elem_corner')
+    if pos is not None:
+        pos = tuple(float(v) for v in pos.find(DIA_NS + 'point').get('val').split(','))
+    fields = get_attribute(obj, 'attributes')
+    fields = 0 if fields is None else len(fields.findall(DIA_NS + 'composite'))
+    return name, pos, fields
+
+
+def inspect_diagram(fileobj, on_table=None):
+    """
+    Parse diagram object by object, dropping each one once it's counted.
+    `on_table(name, pos)` is called for every table as soon as it's parsed.
+    """
+    report = DiagramReport()
+    stack = []
+
+    for event, elem in ET.iterparse(fileobj, events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
+            continue
+        stack.pop()
+        if elem.tag != DIA_NS + 'object':
+            continue
+
+        obj_id = elem.get('id')
+        if obj_id in report.ids:
+            report.duplicate_ids.append(obj_id)
+        report.ids.add(obj_id)
+
+        connections = elem.find(DIA_NS + 'connections')
+        if elem.get('type') == TABLE_TYPE:
+            name, pos, fields = get_table_info(elem)
+            report.tables += 1
+            report.fields += fields
+            if on_table is not None:
+                on_table(name, pos)
+        elif connections is not None:
+            report.relations += 1
+        else:
+            report.other_objects += 1
+
+        if connections is not None:
+            for conn in connections.iterfind(DIA_NS + 'connection'):
+                report.connection_targets.add(conn.get('to'))
+
+        elem.clear()
+        if stack:
+            stack[-1].remove(elem)
+
+    return report
+
+
+def main(argv):
+    with open_diagram(argv[0]) as f:
+        report = inspect_diagram(f)
+    for line in report.summary_lines():
+        print(line)
+    return 0 if report.is_valid else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,94 @@
+from .graph import build_csr, bfs, is_dependency
+
+
+ALL_ROOTS = 'all'
+UNREACHABLE_COLOR = 'E0E0E0'
+CHAIN_COLOR = 'C00000'
+CHAIN_LINE_WIDTH = 0.3
+
+
+class JoinDepth:
+    def __init__(self, depth, paths):
+        self.depth = depth  # table id -> join depth
+        self.paths = paths  # table id -> list of table ids of the chain
+        self.max_depth = max(depth.values(), default=0)
+
+    @property
+    def longest_chains(self):
+        return [p for p in self.paths.values() if len(p) - 1 == self.max_depth and self.max_depth > 0]
+
+
+def get_join_graph(tables, rels):
+    joins = {(r['start_obj_id'], r['end_obj_id']) for r in rels if is_dependency(r)}
+    return build_csr(tables, sorted(joins))
+
+
+def get_path(parent, node):
+    path = [node]
+    while parent[node] >= 0:
+        node = parent[node]
+        path.append(node)
+    path.reverse()
+    return path
+
+
+def analyze_join_depth(tables, rels, roots):
+    """
+    Shortest foreign key chain from any of `roots` (table ids) to every reachable table.
+    """
+    ids, id_to_index, indptr, indices = get_join_graph(tables, rels)
+    distance, parent = bfs(indptr, indices, [id_to_index[r] for r in roots])
+    reachable = [i for i, d in enumerate(distance) if d >= 0]
+    return JoinDepth(
+        {ids[i]: distance[i] for i in reachable},
+        {ids[i]: [ids[n] for n in get_path(parent, i)] for i in reachable},
+    )
+
+
+def analyze_all_pairs(tables, rels):
+    """
+    BFS from every table. Depth of a table is its longest shortest chain to any other table.
+    """
+    ids, id_to_index, indptr, indices = get_join_graph(tables, rels)
+    depth = {}
+    paths = {}
+    for source in range(len(ids)):
+        distance, parent = bfs(indptr, indices, [source])
+        farthest = max(range(len(ids)), key=distance.__getitem__)
+        depth[ids[source]] = distance[farthest]
+        paths[ids[source]] = [ids[n] for n in get_path(parent, farthest)]
+    return JoinDepth(depth, paths)
+
+
+def get_depth_color(depth, max_depth):
+    # green -> yellow -> red
+    ratio = depth / max_depth if max_depth else 0
+    if ratio < 0.5:
+        return '{:02X}E090'.format(int(144 + ratio * 2 * 111))
+    return 'FF{:02X}90'.format(int(224 - (ratio - 0.5) * 2 * 144))
+
+
+def apply_depth_colors(tables, rels, result):
+    for t in tables:
+        if t['id'] in result.depth:
+            t['color'] = get_depth_color(result.depth[t['id']], result.max_depth)
+        else:
+            t['color'] = UNREACHABLE_COLOR
+
+    chain_joins = set()
+    for path in result.longest_chains:
+        chain_joins.update(zip(path, path[1:]))
+    for r in rels:
+        if is_dependency(r) and (r['start_obj_id'], r['end_obj_id']) in chain_joins:
+            r['color'] = CHAIN_COLOR
+            r['line_width'] = CHAIN_LINE_WIDTH
+
+
+def report_lines(result, tables):
+    by_id = {t['id']: t for t in tables}
+    for table_id in sorted(result.depth, key=lambda i: (-result.depth[i], by_id[i]['label'])):
+        yield '{:>4} {}: {}'.format(
+            result.depth[table_id],
+            by_id[table_id]['label'],
+            ' -> '.join(by_id[n]['label'] for n in result.paths[table_id]),
+        )
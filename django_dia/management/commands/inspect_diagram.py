@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ... import inspection
+
+
+class Command(BaseCommand):
+    help = 'Check .dia diagram for dangling connections and duplicate ids, print statistics'
+
+    def add_arguments(self, parser):
+        parser.add_argument('filename', help='Diagram file, gzipped or plain')
+        parser.add_argument('--tables', '-t', action='store_true', dest='list_tables',
+                            help='List table names and positions')
+
+    def handle(self, *args, **options):
+        on_table = None
+        if options['list_tables']:
+            def print_table(name, pos):
+                self.stdout.write('{} {}'.format(name, '' if pos is None else '{:.2f},{:.2f}'.format(*pos)))
+            on_table = print_table
+
+        with inspection.open_diagram(options['filename']) as f:
+            report = inspection.inspect_diagram(f, on_table=on_table)
+
+        for line in report.summary_lines():
+            self.stdout.write(line)
+
+        if not report.is_valid:
+            raise CommandError('Diagram is not valid')
@@ -9,9 +9,13 @@ django-extensions application code (graph_models command)
 import os
 import gzip
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db.migrations.exceptions import AmbiguityError
 
-from ... import utils, diagram
+from ... import (
+    utils, cardinality, cascade, collapse, cycles, diagram, diff, export, history, html, indexes, joindepth, layout,
+    merge, partitions, querylog, storage,
+)
 
 
 def parse_file_or_list(arg):
@@ -23,6 +27,14 @@ def parse_file_or_list(arg):
     return set(arg.split(','))
 
 
+# options needing the whole graph in memory, not available with --stream
+WHOLE_GRAPH_OPTIONS = (
+    'projects', 'at_migration', 'history', 'layers_by_app', 'collapse', 'collapse_all_except', 'layout_restarts',
+    'row_width', 'show_indexes', 'audit_redundant_indexes', 'analyze_cycles', 'join_depth', 'cascade_from',
+    'cardinality', 'suggest_partitions', 'query_log', 'dump_graph', 'export_graph', 'diff',
+)
+
+
 class Command(BaseCommand):
     help = 'Generate .dia diagram of your django project\'s models'
 
@@ -47,37 +59,350 @@ class Command(BaseCommand):
                             default=True, help="Do not sort fields")
         parser.add_argument('--bezier', action='store_true', dest='bezier',
                             help='Use bezier arrows instead of database relation arrows')
+        parser.add_argument('--format', '-f', action='store', dest='format', default='dia', choices=('dia', 'html'),
+                            help='Output format: dia diagram or self-contained html viewer')
+        parser.add_argument('--layers-by-app', action='store_true', dest='layers_by_app',
+                            help='Put each application on its own layer, cross-app relations on a separate one')
+        parser.add_argument('--visible-apps', action='store', dest='visible_apps',
+                            help='With --layers-by-app, only these application layers are initially visible')
+        parser.add_argument('--collapse', action='store', dest='collapse',
+                            help='Show given application(s) as single summary nodes. Can also load list from file.')
+        parser.add_argument('--collapse-all-except', action='store', dest='collapse_all_except',
+                            help='Show all applications except given ones as single summary nodes')
+        parser.add_argument('--project', action='append', dest='projects',
+                            help='Settings module of a project to merge into diagram, can be repeated')
+        parser.add_argument('--at-migration', action='store', dest='at_migration',
+                            help='Render models as they were after given migration, e.g. myapp:0042')
+        parser.add_argument('--history', action='store_true', dest='history',
+                            help='Render a diagram after every migration of selected apps, output is used as prefix')
+        parser.add_argument('--missing-relations', action='store', dest='missing_relations',
+                            default=diagram.MISSING_DROP,
+                            choices=(diagram.MISSING_DROP, diagram.MISSING_REPORT, diagram.MISSING_STUB),
+                            help='Relations to models outside of the diagram: drop them, drop and list them '
+                                 'on stderr, or draw their targets as stub tables')
+        parser.add_argument('--stream', action='store_true', dest='stream',
+                            help='Write diagram while models are processed, keeping memory use bounded. '
+                                 'Only for plain single layer .dia output without analysis options')
+        parser.add_argument('--seed', action='store', type=int, dest='seed',
+                            help='Random seed for colors and positions, makes output reproducible')
+        parser.add_argument('--layout', action='store', dest='layout', default=layout.LAYOUT_RANDOM,
+                            choices=(layout.LAYOUT_RANDOM, layout.LAYOUT_PACKED),
+                            help='Table placement: random, or packed grid grouped by application')
+        parser.add_argument('--layout-restarts', action='store', type=int, dest='layout_restarts', default=0,
+                            help='Try N random layouts and keep one with fewest connector crossings')
+        parser.add_argument('--jobs', '-j', action='store', type=int, dest='jobs',
+                            help='Number of worker processes for layout search (default 1) '
+                                 'and --project workers (default one per project)')
+        parser.add_argument('--row-width', action='store_true', dest='row_width',
+                            help='Show estimated column sizes, highlight wide tables, print report to stderr')
+        parser.add_argument('--wide-row-bytes', action='store', type=int, dest='wide_row_bytes',
+                            default=storage.WIDE_ROW_BYTES, help='Row width considered wide by --row-width')
+        parser.add_argument('--show-indexes', action='store_true', dest='show_indexes',
+                            help='List indexes and unique constraints of every table in its comment')
+        parser.add_argument('--audit-redundant-indexes', action='store_true', dest='audit_redundant_indexes',
+                            help='Like --show-indexes, also mark indexes duplicating or being a prefix of '
+                                 'another index and print them to stderr')
+        parser.add_argument('--analyze-cycles', action='store_true', dest='analyze_cycles',
+                            help='Highlight foreign key cycles, print table load order to stderr')
+        parser.add_argument('--join-depth', action='store', dest='join_depth',
+                            help='Color tables by length of foreign key chain from given root model(s), '
+                                 'or "all" for longest chain from every model. Chains are printed to stderr.')
+        parser.add_argument('--cascade-from', action='store', dest='cascade_from',
+                            help='Show models affected by deleting a row of given model, print them to stderr')
+        parser.add_argument('--cascade-row-counts', action='store_true', dest='cascade_row_counts',
+                            help='With --cascade-from, estimate deleted rows using table row counts from database')
+        parser.add_argument('--cardinality', action='store_true', dest='cardinality',
+                            help='Measure average and p99 children per parent of foreign keys in database, '
+                                 'show them on relations and print them to stderr')
+        parser.add_argument('--cardinality-sample', action='store', type=int, dest='cardinality_sample',
+                            help='With --cardinality, only look at this many child rows per relation')
+        parser.add_argument('--suggest-partitions', action='store', type=int, dest='suggest_partitions',
+                            help='Split models into K groups with few relations between them, color by group '
+                                 'and print cross-group relations to stderr')
+        parser.add_argument('--partition-start', action='store', dest='partition_start',
+                            default=partitions.START_COMMUNITIES,
+                            choices=(partitions.START_COMMUNITIES, partitions.START_APPS),
+                            help='Initial grouping for --suggest-partitions')
+        parser.add_argument('--query-log', action='store', dest='query_log',
+                            help='SQL log file (optionally gzipped) to highlight frequently used tables and joins')
+        parser.add_argument('--dump-graph', action='store', dest='dump_graph',
+                            help='Save prepared tables and relations as JSON snapshot for later --diff')
+        parser.add_argument('--export-graph', action='store', dest='export_graph',
+                            help='Save tables and relations as GraphML (.graphml) or tab separated edge list file')
+        parser.add_argument('--diff', action='store', dest='diff',
+                            help='Render only tables changed since given JSON snapshot')
 
     def handle(self, *args, **options):
-        model_list = utils.get_full_model_list(
-            utils.get_target_apps(
-                options['appnames'],
-                allapps=options['all_applications']
-            ),
-            exclude_models=parse_file_or_list(options['exclude_models'])
-        )
-
-        if options['pretend']:
-            for lbl in sorted(utils.get_model_label(m) for m in model_list):
-                self.stdout.write(lbl)
-            return
-
         self.verbose_names = options['verbose_names']
         self.exclude_fields = parse_file_or_list(options['exclude_columns'])
         self.sort_fields = options['sort_fields']
 
-        tables, rels = diagram.prepare_data(model_list, inheritance=options['inheritance'])
+        if options['suggest_partitions'] is not None and options['suggest_partitions'] < 1:
+            raise CommandError('--suggest-partitions should be at least 1')
+
+        if options['history']:
+            self.handle_history(options)
+            return
+
+        if options['stream'] and not options['pretend']:
+            self.handle_stream(options)
+            return
+
+        dropped = []
+        if options['projects']:
+            tables, rels = self.prepare_projects(options, dropped)
+            if options['pretend']:
+                for lbl in sorted({t['label'] for t in tables}):
+                    self.stdout.write(lbl)
+                return
+        elif options['at_migration']:
+            loader = history.get_loader()
+            tables, rels = history.prepare_data_at(
+                loader,
+                self.get_migration_node(loader, options['at_migration']),
+                app_labels=self.get_target_app_labels(options),
+                exclude_models=parse_file_or_list(options['exclude_models']),
+                inheritance=options['inheritance'],
+                seed=options['seed'],
+                missing=options['missing_relations'],
+                dropped=dropped,
+            )
+            if options['pretend']:
+                for lbl in sorted(t['label'] for t in tables):
+                    self.stdout.write(lbl)
+                return
+        else:
+            model_list = utils.get_full_model_list(
+                utils.get_target_apps(
+                    options['appnames'],
+                    allapps=options['all_applications']
+                ),
+                exclude_models=parse_file_or_list(options['exclude_models'])
+            )
+
+            if options['pretend']:
+                for lbl in sorted(utils.get_model_label(m) for m in model_list):
+                    self.stdout.write(lbl)
+                return
+
+            tables, rels = diagram.prepare_data(
+                model_list,
+                inheritance=options['inheritance'],
+                seed=options['seed'],
+                missing=options['missing_relations'],
+                dropped=dropped,
+            )
+
+        if options['missing_relations'] == diagram.MISSING_REPORT:
+            self.report_dropped(dropped)
+
+        if options['dump_graph']:
+            with open(options['dump_graph'], 'w') as f:
+                f.write(diff.dump_graph(tables, rels))
+
+        if options['export_graph']:
+            with open(options['export_graph'], 'wb') as f:
+                f.write(export.export_graph(tables, rels, fmt=export.get_format(options['export_graph'])))
+
+        if options['diff']:
+            old = diff.Graph(*diff.load_graph(options['diff']))
+            new = diff.Graph(tables, rels)
+            schema_diff = diff.diff_graphs(old, new)
+            for line in schema_diff.summary_lines():
+                self.stderr.write(line)
+            tables, rels = diff.make_diff_data(old, new, schema_diff)
+
+        self.render(tables, rels, options, options['outputfile'])
+
+    def render(self, tables, rels, options, outfile):
+        if options['row_width']:
+            report = storage.apply_row_width(tables, wide_row_bytes=options['wide_row_bytes'])
+            for line in storage.report_lines(report):
+                self.stderr.write(line)
+
+        if options['audit_redundant_indexes']:
+            findings = indexes.audit_redundant_indexes(tables)
+            indexes.apply_index_comments(tables, findings)
+            for line in indexes.report_lines(findings):
+                self.stderr.write(line)
+        elif options['show_indexes']:
+            indexes.apply_index_comments(tables)
+
+        if options['analyze_cycles']:
+            analysis = cycles.analyze_cycles(tables, rels)
+            cycles.apply_cycle_highlight(tables, rels, analysis)
+            for line in cycles.report_lines(analysis, tables):
+                self.stderr.write(line)
+
+        if options['join_depth']:
+            result = self.analyze_join_depth(tables, rels, options['join_depth'])
+            joindepth.apply_depth_colors(tables, rels, result)
+            for line in joindepth.report_lines(result, tables):
+                self.stderr.write(line)
+
+        if options['cascade_from']:
+            result = self.analyze_cascade(tables, rels, options['cascade_from'], options['cascade_row_counts'])
+            cascade.apply_cascade_colors(tables, rels, result)
+            for line in cascade.report_lines(result, tables):
+                self.stderr.write(line)
+
+        if options['cardinality']:
+            measures = cardinality.measure_cardinality(tables, rels, sample=options['cardinality_sample'])
+            cardinality.apply_cardinality(rels, measures)
+            for line in cardinality.report_lines(tables, rels, measures):
+                self.stderr.write(line)
+
+        if options['suggest_partitions'] is not None:
+            assignment = partitions.suggest_partitions(
+                tables, rels, options['suggest_partitions'], start=options['partition_start'])
+            partitions.apply_partition_colors(tables, assignment)
+            for line in partitions.report_lines(tables, rels, assignment):
+                self.stderr.write(line)
+
+        if options['query_log']:
+            stats = querylog.read_query_log(options['query_log'], querylog.get_known_tables(tables, rels))
+            querylog.apply_query_stats(tables, rels, stats)
+
+        collapsed = collapse.get_collapsed_apps(
+            tables,
+            collapse=parse_file_or_list(options['collapse']),
+            collapse_all_except=parse_file_or_list(options['collapse_all_except']),
+        )
+        tables, rels = collapse.collapse_apps(tables, rels, collapsed)
+
+        if options['layout'] == layout.LAYOUT_PACKED:
+            layout.apply_layout(tables, layout.packed_layout(tables))
+        elif options['layout_restarts'] > 0:
+            layout.apply_layout(tables, layout.search_layout(
+                tables, rels, options['layout_restarts'], jobs=options['jobs'] or 1, seed=options['seed']))
+
+        if options['format'] == 'html':
+            self.write_output(html.html_page(tables, rels), outfile, ext='.html', compress=False)
+            return
 
         self.write_output(
-            diagram.dia_xml(tables, rels, bezier=options['bezier']),
-            options['outputfile']
+            diagram.dia_xml(
+                tables, rels,
+                bezier=options['bezier'],
+                layers_by_app=options['layers_by_app'],
+                visible_apps=parse_file_or_list(options['visible_apps']) or None,
+            ),
+            outfile
+        )
+
+    def handle_stream(self, options):
+        unsupported = [name for name in WHOLE_GRAPH_OPTIONS if options[name]]
+        if options['format'] != 'dia':
+            unsupported.append('format')
+        if options['layout'] != layout.LAYOUT_RANDOM:
+            unsupported.append('layout')
+        if unsupported:
+            raise CommandError('--stream can\'t be used with: {}'.format(
+                ', '.join('--' + name.replace('_', '-') for name in unsupported)))
+
+        model_list = utils.get_full_model_list(
+            utils.get_target_apps(options['appnames'], allapps=options['all_applications']),
+            exclude_models=parse_file_or_list(options['exclude_models'])
+        )
+        dropped = []
+        self.write_chunks(
+            diagram.stream_diagram(
+                model_list,
+                seed=options['seed'],
+                inheritance=options['inheritance'],
+                missing=options['missing_relations'],
+                dropped=dropped,
+                bezier=options['bezier'],
+            ),
+            options['outputfile'],
         )
+        if options['missing_relations'] == diagram.MISSING_REPORT:
+            self.report_dropped(dropped)
+
+    def report_dropped(self, dropped):
+        for line in diagram.dropped_report_lines(dropped):
+            self.stderr.write(line)
+
+    def analyze_join_depth(self, tables, rels, roots):
+        if roots == joindepth.ALL_ROOTS:
+            return joindepth.analyze_all_pairs(tables, rels)
+        label_to_id = {t['label']: t['id'] for t in tables}
+        roots = parse_file_or_list(roots)
+        unknown = roots - set(label_to_id)
+        if unknown:
+            raise CommandError('Unknown root model(s): {}'.format(', '.join(sorted(unknown))))
+        return joindepth.analyze_join_depth(tables, rels, [label_to_id[r] for r in sorted(roots)])
+
+    def analyze_cascade(self, tables, rels, root, row_counts=False):
+        label_to_id = {t['label']: t['id'] for t in tables}
+        if root not in label_to_id:
+            raise CommandError('Unknown model: {}'.format(root))
+        return cascade.analyze_cascade(
+            tables, rels, label_to_id[root],
+            row_counts=cascade.get_row_counts(tables) if row_counts else None,
+        )
+
+    def get_target_app_labels(self, options):
+        if options['all_applications']:
+            return None
+        return {app.label for app in utils.get_target_apps(options['appnames'])}
+
+    def get_migration_node(self, loader, target):
+        try:
+            return history.parse_migration_target(loader, target)
+        except (ValueError, KeyError, AmbiguityError) as e:
+            raise CommandError(str(e))
+
+    def handle_history(self, options):
+        if not options['outputfile']:
+            raise CommandError('--history requires --output, it is used as prefix of file names')
+        dropped = []
+        for (app_label, name), (tables, rels) in history.iter_history_data(
+            history.get_loader(),
+            app_labels=self.get_target_app_labels(options),
+            exclude_models=parse_file_or_list(options['exclude_models']),
+            inheritance=options['inheritance'],
+            seed=options['seed'],
+            missing=options['missing_relations'],
+            dropped=dropped,
+        ):
+            outfile = '{}_{}_{}'.format(options['outputfile'], app_label, name)
+            self.render(tables, rels, options, outfile)
+            self.stderr.write(outfile)
+            if options['missing_relations'] == diagram.MISSING_REPORT:
+                self.report_dropped(dropped)
+
+    def prepare_projects(self, options, dropped=None):
+        try:
+            project_data = merge.collect_projects(
+                options['projects'],
+                jobs=options['jobs'],
+                dropped=dropped,
+                missing=options['missing_relations'],
+                appnames=options['appnames'],
+                all_applications=options['all_applications'],
+                inheritance=options['inheritance'],
+                exclude_models=parse_file_or_list(options['exclude_models']),
+                seed=options['seed'],
+            )
+        except merge.WorkerError as e:
+            raise CommandError(str(e))
+        return merge.merge_projects(project_data)
+
+    def write_output(self, data, outfile, ext='.dia', compress=True):
+        self.write_chunks([data], outfile, ext=ext, compress=compress)
 
-    def write_output(self, xml, outfile):
+    def write_chunks(self, chunks, outfile, ext='.dia', compress=True):
         if outfile:
-            if outfile[-4:] != '.dia':
-                outfile += '.dia'
-            with gzip.open(outfile, 'wb') as f:
-                f.write(xml)
+            if not outfile.endswith(ext):
+                outfile += ext
+            with (gzip.open if compress else open)(outfile, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
         else:
-            self.stdout.write(xml.decode('utf-8'))
+            text = ''
+            for chunk in chunks:
+                text = chunk.decode('utf-8')
+                self.stdout.write(text, ending='')
+            if not text.endswith('\n'):
+                self.stdout.write('')
@@ -0,0 +1,128 @@
+import json
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+
+from . import worker
+from .diagram import get_field_port
+
+
+class WorkerError(Exception):
+    pass
+
+
+def run_worker(args):
+    proc = subprocess.run(
+        [sys.executable, '-m', 'django_dia.worker'] + args,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    if proc.returncode != 0:
+        raise WorkerError('{}: {}'.format(args[0], proc.stderr.decode('utf-8', 'replace')))
+    data = json.loads(proc.stdout.decode('utf-8'))
+    return data['tables'], data['relations'], data.get('dropped', [])
+
+
+def get_project_label(project, label):
+    return '{}:{}'.format(project, label)
+
+
+def collect_projects(projects, jobs=None, dropped=None, seed=None, **kwargs):
+    """
+    Prepare data of every settings module in its own process, by default all at once.
+    Returns list of (settings, tables, relations).
+    Every project gets its own seed derived from `seed`, so their positions and colors differ.
+    Relations dropped by workers are described in `dropped` list if one is given.
+    """
+    args = [
+        worker.make_args(settings, seed=None if seed is None else seed + n, **kwargs)
+        for n, settings in enumerate(projects)
+    ]
+    with ThreadPoolExecutor(max_workers=jobs or len(projects)) as executor:
+        results = list(executor.map(run_worker, args))
+    if dropped is not None:
+        for settings, (_, _, project_dropped) in zip(projects, results):
+            dropped.extend(dict(d, start=get_project_label(settings, d['start'])) for d in project_dropped)
+    return [(settings, tables, rels) for settings, (tables, rels, _) in zip(projects, results)]
+
+
+def get_relation_key(rel):
+    return (
+        rel['start_obj_id'], rel['end_obj_id'],
+        rel['start_label'], rel['end_label'],
+        rel['dotted'], rel.get('through_table'),
+    )
+
+
+def get_table_key(table):
+    if table.get('concrete'):
+        return table['db_table']
+    # proxy and abstract models share db_table with other models, or have none
+    return table['db_table'], table['name']
+
+
+def get_port_field(port, table):
+    """
+    Name of the field row `port` points to, None for side ports.
+    """
+    if port < get_field_port(0) or port % 2:
+        return None
+    index = (port - get_field_port(0)) // 2
+    return table['fields'][index]['name'] if index < len(table['fields']) else None
+
+
+def merge_fields(merged, table):
+    names = {f['name'] for f in merged['fields']}
+    merged['fields'].extend(dict(f) for f in table['fields'] if f['name'] not in names)
+
+
+def merge_projects(project_data):
+    """
+    Give every object a new id unique across projects, prefix labels with the project.
+    Concrete tables sharing db_table are drawn once with fields of all projects,
+    so are relations between them. Proxy and abstract models are merged by db_table and model name.
+    """
+    obj_num = count()
+    tables = []
+    rels = []
+    by_table_key = {}
+    seen_rels = set()
+
+    for project, project_tables, project_rels in project_data:
+        id_map = {}
+        for t in project_tables:
+            key = get_table_key(t)
+            shared = by_table_key.get(key) if t['db_table'] else None
+            if shared is not None:
+                shared['projects'].append(project)
+                merge_fields(shared, t)
+                id_map[t['id']] = shared
+                continue
+            merged = dict(
+                t, id=next(obj_num), label=get_project_label(project, t['label']),
+                fields=[dict(f) for f in t['fields']], projects=[project],
+            )
+            id_map[t['id']] = merged
+            if t['db_table']:
+                by_table_key[key] = merged
+            tables.append(merged)
+
+        by_id = {t['id']: t for t in project_tables}
+        for r in project_rels:
+            merged = dict(r, start_obj_id=id_map[r['start_obj_id']]['id'], end_obj_id=id_map[r['end_obj_id']]['id'])
+            key = get_relation_key(merged)
+            if key in seen_rels:
+                continue
+            seen_rels.add(key)
+            # field rows may be at other positions in the merged table
+            for port_key, obj_key in (('start_port', 'start_obj_id'), ('end_port', 'end_obj_id')):
+                name = get_port_field(r[port_key], by_id[r[obj_key]])
+                if name is not None:
+                    fields = id_map[r[obj_key]]['fields']
+                    merged[port_key] = get_field_port([f['name'] for f in fields].index(name))
+            rels.append(merged)
+
+    for r in rels:
+        r['id'] = next(obj_num)
+
+    return tables, rels
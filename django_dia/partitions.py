@@ -0,0 +1,255 @@
+import colorsys
+import math
+from collections import Counter, deque
+
+
+START_APPS = 'apps'
+START_COMMUNITIES = 'communities'
+
+# partition can grow this much above average size during refinement
+BALANCE_SLACK = 1.5
+REFINE_PASSES = 10
+PROPAGATION_PASSES = 10
+
+
+def get_undirected_adjacency(tables, rels):
+    adjacency = {t['id']: Counter() for t in tables}
+    for r in rels:
+        a, b = r['start_obj_id'], r['end_obj_id']
+        if a != b:
+            adjacency[a][b] += 1
+            adjacency[b][a] += 1
+    return adjacency
+
+
+def get_size_limit(nodes, k):
+    return max(1, math.ceil(nodes / k * BALANCE_SLACK))
+
+
+def get_triangle_weights(adjacency):
+    """
+    Relation weight multiplied by number of shared neighbours plus one,
+    so labels don't leak over lone bridge relations between dense groups.
+    """
+    neighbours = {n: set(succs) for n, succs in adjacency.items()}
+    return {
+        node: {
+            succ: w * (1 + len(neighbours[node] & neighbours[succ]))
+            for succ, w in succs.items()
+        }
+        for node, succs in adjacency.items()
+    }
+
+
+def propagate_labels(adjacency, limit):
+    """
+    Label propagation: every node takes the label of its neighbours having most
+    (triangle weighted) relations to it, unless that community already reached `limit` size.
+    Near-linear, ties go to the smallest label so the result is deterministic.
+    """
+    adjacency = get_triangle_weights(adjacency)
+    labels = {n: n for n in adjacency}
+    sizes = Counter(labels.values())
+    for _ in range(PROPAGATION_PASSES):
+        changed = False
+        for node in sorted(adjacency):
+            current = labels[node]
+            weights = Counter()
+            for succ, w in adjacency[node].items():
+                lbl = labels[succ]
+                if lbl == current or sizes[lbl] < limit:
+                    weights[lbl] += w
+            if not weights:
+                continue
+            best = max(weights.values())
+            label = min(lbl for lbl, w in weights.items() if w == best)
+            if weights[current] < best and label != current:
+                labels[node] = label
+                sizes[current] -= 1
+                sizes[label] += 1
+                changed = True
+        if not changed:
+            break
+    return labels
+
+
+def normalize_groups(assignment):
+    """
+    Renumber groups 0..k-1 in order of their smallest member.
+    """
+    mapping = {}
+    for node in sorted(assignment):
+        mapping.setdefault(assignment[node], len(mapping))
+    return {node: mapping[g] for node, g in assignment.items()}
+
+
+def get_group_weights(adjacency, assignment):
+    weights = Counter()
+    for node, succs in adjacency.items():
+        for succ, w in succs.items():
+            a, b = assignment[node], assignment[succ]
+            if a < b:
+                weights[(a, b)] += w
+    return weights
+
+
+def merge_groups(adjacency, assignment, k, limit):
+    """
+    Merge pairs of groups until k left, preferring densely connected small groups
+    which fit into `limit` together.
+    Pair weights are kept up to date on merge instead of recounting relations.
+    """
+    sizes = Counter(assignment.values())
+    members = {}
+    for node, g in assignment.items():
+        members.setdefault(g, []).append(node)
+    weights = get_group_weights(adjacency, assignment)
+
+    while len(sizes) > k:
+        if weights:
+            a, b = max(weights, key=lambda p: (
+                sizes[p[0]] + sizes[p[1]] <= limit,
+                weights[p] / (sizes[p[0]] * sizes[p[1]]),
+                -p[0], -p[1],
+            ))
+            if sizes[a] + sizes[b] > limit:
+                # no connected pair fits, merge two smallest groups instead
+                a, b = sorted(sizes, key=lambda g: (sizes[g], g))[:2]
+        else:
+            a, b = sorted(sizes, key=lambda g: (sizes[g], g))[:2]
+        a, b = min(a, b), max(a, b)
+
+        for node in members[b]:
+            assignment[node] = a
+        members[a].extend(members.pop(b))
+        sizes[a] += sizes.pop(b)
+        for pair in [p for p in weights if b in p]:
+            w = weights.pop(pair)
+            other = pair[0] if pair[1] == b else pair[1]
+            if other != a:
+                weights[(min(a, other), max(a, other))] += w
+    return assignment
+
+
+def bisect_group(adjacency, members):
+    """
+    Grow a half by BFS from the first member, staying inside the group.
+    """
+    members = set(members)
+    start = min(members)
+    half = set()
+    queue = deque([start])
+    seen = {start}
+    target = len(members) // 2
+    while len(half) < target:
+        if not queue:
+            rest = min(members - seen)
+            seen.add(rest)
+            queue.append(rest)
+        node = queue.popleft()
+        half.add(node)
+        for succ in sorted(adjacency[node]):
+            if succ in members and succ not in seen:
+                seen.add(succ)
+                queue.append(succ)
+    return half
+
+
+def split_groups(adjacency, assignment, k):
+    sizes = Counter(assignment.values())
+    next_group = max(sizes, default=-1) + 1
+    while len(sizes) < k:
+        largest = max(sizes, key=lambda g: (sizes[g], -g))
+        if sizes[largest] < 2:
+            break
+        members = [n for n, g in assignment.items() if g == largest]
+        for node in bisect_group(adjacency, members):
+            assignment[node] = next_group
+        sizes = Counter(assignment.values())
+        next_group += 1
+    return assignment
+
+
+def refine(adjacency, assignment, limit):
+    """
+    Move nodes to the neighbouring group they have most relations with,
+    while groups stay under the size limit. O(passes * (nodes + relations)).
+    """
+    sizes = Counter(assignment.values())
+    for _ in range(REFINE_PASSES):
+        moved = False
+        for node in sorted(adjacency):
+            current = assignment[node]
+            weights = Counter()
+            for succ, w in adjacency[node].items():
+                weights[assignment[succ]] += w
+            if not weights:
+                continue
+            best = max(
+                [g for g in weights if sizes[g] < limit] + [current],
+                key=lambda g: (weights[g], g == current, -g),
+            )
+            if best != current and weights[best] > weights[current] and sizes[current] > 1:
+                assignment[node] = best
+                sizes[current] -= 1
+                sizes[best] += 1
+                moved = True
+        if not moved:
+            break
+    return assignment
+
+
+def suggest_partitions(tables, rels, k, start=START_COMMUNITIES):
+    """
+    Returns table id -> partition number (0..k-1).
+    """
+    if k < 1:
+        raise ValueError('Number of partitions should be at least 1, got {}'.format(k))
+    adjacency = get_undirected_adjacency(tables, rels)
+    limit = get_size_limit(len(tables), k)
+    if start == START_APPS:
+        app_ids = {}
+        assignment = {t['id']: app_ids.setdefault(t['app_label'], len(app_ids)) for t in tables}
+    else:
+        assignment = propagate_labels(adjacency, limit)
+    assignment = normalize_groups(assignment)
+    assignment = merge_groups(adjacency, assignment, k, limit)
+    assignment = split_groups(adjacency, normalize_groups(assignment), k)
+    assignment = refine(adjacency, assignment, limit)
+    return normalize_groups(assignment)
+
+
+def get_cross_relations(rels, assignment):
+    return [
+        r for r in rels
+        if assignment[r['start_obj_id']] != assignment[r['end_obj_id']]
+    ]
+
+
+def get_partition_color(index, total):
+    r, g, b = colorsys.hsv_to_rgb(index / max(total, 1), 0.35, 1.0)
+    return '{:02X}{:02X}{:02X}'.format(int(r * 255), int(g * 255), int(b * 255))
+
+
+def apply_partition_colors(tables, assignment):
+    total = len(set(assignment.values()))
+    for t in tables:
+        t['color'] = get_partition_color(assignment[t['id']], total)
+
+
+def report_lines(tables, rels, assignment):
+    by_id = {t['id']: t for t in tables}
+    groups = {}
+    for table_id, g in assignment.items():
+        groups.setdefault(g, []).append(by_id[table_id]['label'])
+    for g in sorted(groups):
+        yield 'Partition {} ({} models): {}'.format(g, len(groups[g]), ', '.join(sorted(groups[g])))
+
+    cross = get_cross_relations(rels, assignment)
+    yield 'Cross-partition relations: {}'.format(len(cross))
+    for r in cross:
+        yield '  {}.{} -> {} ({} -> {})'.format(
+            by_id[r['start_obj_id']]['label'], r.get('start_field_name') or '',
+            by_id[r['end_obj_id']]['label'],
+            assignment[r['start_obj_id']], assignment[r['end_obj_id']],
+        )
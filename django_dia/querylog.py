@@ -0,0 +1,230 @@
+import ast
+import gzip
+import math
+import re
+from collections import Counter
+from itertools import combinations
+
+
+# Statements longer than this are cut to keep memory bounded on broken logs
+MAX_STATEMENT_SIZE = 1024 * 1024
+
+STATEMENT_START = re.compile(r'(SELECT|INSERT|UPDATE|DELETE|WITH)\b', re.IGNORECASE)
+COMMENT_START = re.compile(r'\s*(#|--)')
+IDENTIFIER = re.compile(r'[\w$]+')
+QUOTES = re.compile(r'["`\[\]]')
+# qualifier of "alias.column" or "schema.table.column"
+QUALIFIER = re.compile(r'(?:[\w$]+\.)?([\w$]+)\.[\w$]+')
+ON_CLAUSE = re.compile(
+    r'\b(?:on|using)\b(.*?)(?:\b(?:where|group|order|limit|having|union|inner|left|right|full|cross|natural)\b|$)',
+    re.DOTALL)
+NOT_ALIAS = {
+    'on', 'using', 'where', 'inner', 'left', 'right', 'full', 'cross', 'natural', 'outer', 'join',
+    'group', 'order', 'limit', 'having', 'union', 'set', 'values', 'lateral',
+}
+# "FROM schema.table alias" or "JOIN table AS alias", on unquoted lower-cased text
+TABLE_REF = re.compile(r'\b(?:from|join)\s+(?:[\w$]+\.)?([\w$]+)(?:\s+(?:as\s+)?(?!(?:{})\b)([\w$]+))?'.format(
+    '|'.join(sorted(NOT_ALIAS))))
+
+# Prefixes of log records carrying one statement each,
+# with words one of which the line must contain to be worth matching
+STATEMENT_PREFIXES = (
+    # PostgreSQL: "2020-01-01 00:00:00 UTC [42] LOG:  duration: 0.1 ms  statement: SELECT ..."
+    (('LOG:', 'STATEMENT:'), re.compile(
+        r'.*?\b(?:LOG|STATEMENT):\s+(?:duration:\s*[\d.]+\s*ms\s+)?'
+        r'(?:(?:statement|execute\s[^:]*):\s*)?(?=\S)')),
+    # MySQL general log: "2020-01-01T00:00:00.000000Z    12 Query\tSELECT ..."
+    (('Query', 'Execute'), re.compile(r'\S+\s+\d+\s+(?:Query|Execute)\s+')),
+)
+# Other log records (durations, parameters, errors), they end current statement
+LOG_RECORD = re.compile(r'\S.*?\b(?:LOG|DETAIL|HINT|CONTEXT|ERROR|WARNING|FATAL|NOTICE):\s')
+
+MAX_LINE_WIDTH = 0.6
+COLD_COLOR = 'E0E0E0'
+
+
+def unwrap_record(line):
+    """
+    Statement of a log record line, or None if the line is not a record:
+    a dict of Django's connection.queries or a line with known log prefix.
+    """
+    stripped = line.strip()
+    if stripped.startswith('{'):
+        try:
+            record = ast.literal_eval(stripped.rstrip(','))
+        except (ValueError, SyntaxError):
+            record = None
+        if isinstance(record, dict) and 'sql' in record:
+            return str(record['sql']) + '\n'
+    for words, prefix in STATEMENT_PREFIXES:
+        if not any(word in line for word in words):
+            continue
+        m = prefix.match(line)
+        if m and STATEMENT_START.match(line, m.end()):
+            return line[m.end():]
+    return None
+
+
+def iter_statements(lines):
+    """
+    Split a stream of log lines into SQL statements.
+
+    Every log record (``connection.queries`` dict or line with a PostgreSQL/MySQL log prefix)
+    is a statement of its own. Otherwise a statement starts at a line beginning with
+    a statement keyword at column 0; indented lines and other lines continue it.
+    A statement also ends at ``;`` and at an empty line.
+    Lines starting with ``#`` or ``--`` are treated as log noise.
+    """
+    buf = []
+    size = 0
+    for line in lines:
+        if COMMENT_START.match(line):
+            continue
+        statement = unwrap_record(line)
+        is_noise = statement is None and LOG_RECORD.match(line)
+        if statement is None:
+            statement = line
+            starts = not line[:1].isspace() and STATEMENT_START.match(line)
+        else:
+            starts = True
+        if buf and (not line.strip() or starts or is_noise or size > MAX_STATEMENT_SIZE):
+            yield ''.join(buf)
+            buf = []
+            size = 0
+        if not line.strip() or is_noise:
+            continue
+        buf.append(statement)
+        size += len(statement)
+        if statement.strip().endswith(';'):
+            yield ''.join(buf)
+            buf = []
+            size = 0
+    if buf:
+        yield ''.join(buf)
+
+
+class TableMatcher:
+    """
+    Finds known table names among identifiers of a statement, case insensitive.
+    One pass of a single identifier regex and a dict lookup per identifier,
+    so the cost doesn't grow with the number of tables.
+    """
+    def __init__(self, db_tables):
+        self.tables = {t.lower(): t for t in db_tables if t}
+
+    def findall(self, statement):
+        tables = self.tables
+        return [tables[word] for word in IDENTIFIER.findall(statement.lower()) if word in tables]
+
+    def find_join_pairs(self, statement):
+        """
+        Pairs of tables joined by each JOIN clause: tables whose columns its ON condition compares,
+        or for USING and unqualified conditions the joined table and the table before it.
+        Tables only mentioned elsewhere in the statement (subqueries, other joins) aren't paired.
+        """
+        text = QUOTES.sub('', statement.lower())
+        if 'join' not in text:
+            return []
+        aliases = {}  # alias or table name -> table
+        refs = []  # (position, keyword is join, table) of FROM and JOIN clauses
+        for m in TABLE_REF.finditer(text):
+            table = self.tables.get(m.group(1))
+            if table is None:
+                continue
+            aliases[m.group(1)] = table
+            if m.group(2):
+                aliases[m.group(2)] = table
+            refs.append((m.start(), text.startswith('join', m.start()), table))
+
+        pairs = []
+        for n, (pos, is_join, table) in enumerate(refs):
+            if not is_join:
+                continue
+            end = refs[n + 1][0] if n + 1 < len(refs) else len(text)
+            on = ON_CLAUSE.search(text, pos, end)
+            joined = {q: aliases[q] for q in QUALIFIER.findall(on.group(1)) if q in aliases} if on else {}
+            if len(joined) >= 2:
+                pairs.extend(combinations(sorted(joined.values()), 2))
+            elif n > 0:
+                pairs.append(tuple(sorted((refs[n - 1][2], table))))
+        return pairs
+
+
+class QueryStats:
+    def __init__(self):
+        self.tables = Counter()
+        self.pairs = Counter()
+        self.statements = 0
+
+    def add(self, found, pairs=()):
+        self.statements += 1
+        self.tables.update(set(found))
+        self.pairs.update(pairs)
+
+    def get_pair(self, a, b):
+        return self.pairs[(a, b) if a <= b else (b, a)]
+
+
+def collect_query_stats(lines, db_tables):
+    matcher = TableMatcher(db_tables)
+    stats = QueryStats()
+    for statement in iter_statements(lines):
+        found = matcher.findall(statement)
+        if found:
+            stats.add(found, matcher.find_join_pairs(statement))
+    return stats
+
+
+def open_query_log(filename):
+    if filename.endswith('.gz'):
+        return gzip.open(filename, 'rt', encoding='utf-8', errors='replace')
+    return open(filename, 'r', encoding='utf-8', errors='replace')
+
+
+def read_query_log(filename, db_tables):
+    with open_query_log(filename) as f:
+        return collect_query_stats(f, db_tables)
+
+
+def get_heat_ratio(value, max_value):
+    if value <= 0 or max_value <= 0:
+        return 0.0
+    return math.log1p(value) / math.log1p(max_value)
+
+
+def get_heat_color(ratio):
+    # pale yellow -> red
+    g = int(240 - ratio * 200)
+    b = int(200 - ratio * 170)
+    return 'FF{:02X}{:02X}'.format(g, b)
+
+
+def get_known_tables(tables, rels):
+    """
+    Table names to look for in the log: tables of the diagram and many-to-many through tables.
+    """
+    names = [t['db_table'] for t in tables if t.get('db_table')]
+    names.extend(r['through_table'] for r in rels if r.get('through_table'))
+    return sorted(set(names))
+
+
+def get_relation_hits(rel, table_by_id, stats):
+    if rel.get('through_table'):
+        return stats.tables[rel['through_table']]
+    return stats.get_pair(
+        table_by_id[rel['start_obj_id']]['db_table'],
+        table_by_id[rel['end_obj_id']]['db_table'],
+    )
+
+
+def apply_query_stats(tables, rels, stats):
+    table_by_id = {t['id']: t for t in tables}
+    max_table_hits = max((stats.tables[t['db_table']] for t in tables), default=0)
+    for t in tables:
+        hits = stats.tables[t['db_table']]
+        t['color'] = get_heat_color(get_heat_ratio(hits, max_table_hits)) if hits else COLD_COLOR
+
+    rel_hits = [get_relation_hits(r, table_by_id, stats) for r in rels]
+    max_rel_hits = max(rel_hits, default=0)
+    for r, hits in zip(rels, rel_hits):
+        r['line_width'] = 0.1 + get_heat_ratio(hits, max_rel_hits) * (MAX_LINE_WIDTH - 0.1)
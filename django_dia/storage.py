@@ -0,0 +1,94 @@
+import math
+import re
+
+
+# Rough estimates in bytes, they don't try to follow any particular database exactly
+TEXT_SIZE = 256  # unbounded text, json and binary columns
+VARCHAR_FILL = 0.5  # average share of max_length actually used
+VARLENA_HEADER = 4
+NULL_BITMAP = 0.125
+DEFAULT_SIZE = 8
+
+WIDE_ROW_BYTES = 1024
+WIDE_ROW_COLOR = 'FF9090'
+
+# Patterns are matched at the start of db_type, so CHECK constraints and
+# longer type names ("interval" vs "int") don't give false matches
+FIXED_SIZES = (
+    # checked in order, first match wins
+    (re.compile(r'(bigint|bigserial|int8)\b'), 8),
+    (re.compile(r'(smallint|smallserial|int2)\b'), 2),
+    (re.compile(r'tinyint\b'), 1),
+    (re.compile(r'(int|integer|int4|mediumint|serial)\b'), 4),
+    (re.compile(r'bool(ean)?\b'), 1),
+    (re.compile(r'(double|float\d*|real)\b'), 8),
+    (re.compile(r'uuid\b'), 16),
+    (re.compile(r'(timestamp|datetime)\b'), 8),
+    (re.compile(r'interval\b'), 16),
+    (re.compile(r'date\b'), 4),
+    (re.compile(r'time\b'), 8),
+)
+UNBOUNDED = re.compile(r'((tiny|medium|long)?(text|blob)|jsonb?|bytea|n?clob|(var)?binary)\b')
+VARCHAR = re.compile(r'n?(var)?char|character\b')
+NUMERIC = re.compile(r'(decimal|numeric)\b')
+
+
+def estimate_numeric_size(field):
+    # two digits per byte, integer and fractional parts are stored separately
+    digits = field.get('max_digits') or 16
+    places = min(field.get('decimal_places') or 0, digits)
+    return VARLENA_HEADER + math.ceil((digits - places) / 2) + math.ceil(places / 2)
+
+
+def estimate_field_size(field):
+    db_type = field.get('db_type')
+    if not db_type:
+        # no column, e.g. many-to-many
+        return 0
+    db_type = db_type.strip().lower()
+    size = None
+    if NUMERIC.match(db_type):
+        size = estimate_numeric_size(field)
+    elif VARCHAR.match(db_type) and field.get('max_length'):
+        size = VARLENA_HEADER + field['max_length'] * VARCHAR_FILL
+    elif UNBOUNDED.match(db_type):
+        size = TEXT_SIZE
+    else:
+        for regex, fixed in FIXED_SIZES:
+            if regex.match(db_type):
+                size = fixed
+                break
+    if size is None:
+        size = DEFAULT_SIZE
+    if field.get('nullable'):
+        size += NULL_BITMAP
+    return size
+
+
+def estimate_row_width(table):
+    return sum(estimate_field_size(f) for f in table['fields'])
+
+
+def apply_row_width(tables, wide_row_bytes=WIDE_ROW_BYTES):
+    """
+    Add size estimate to every field type, highlight tables with wide rows.
+    Returns report entries sorted from the widest table: (row bytes, table, widest field).
+    """
+    report = []
+    for t in tables:
+        sizes = [estimate_field_size(f) for f in t['fields']]
+        t['row_width'] = sum(sizes)
+        for f, size in zip(t['fields'], sizes):
+            if size:
+                f['type'] = '{} ~{}B'.format(f['type'], int(math.ceil(size)))
+        if t['row_width'] >= wide_row_bytes:
+            t['color'] = WIDE_ROW_COLOR
+        widest = max(zip(sizes, (f['name'] for f in t['fields'])), default=(0, None))
+        report.append((t['row_width'], t, widest[1]))
+    report.sort(key=lambda r: (-r[0], r[1]['label']))
+    return report
+
+
+def report_lines(report):
+    for width, table, widest in report:
+        yield '{:>10.0f} {} (widest: {})'.format(width, table['label'], widest)
@@ -1,6 +1,9 @@
 from django.contrib.contenttypes.fields import GenericRelation
-from django.db.models.fields.related import ForeignKey, OneToOneField, ManyToManyField
+from django.db.models.fields.related import (
+    RECURSIVE_RELATIONSHIP_CONSTANT, ForeignKey, OneToOneField, ManyToManyField,
+)
 from django.apps import apps
+from django.db import connection
 
 
 def get_apps():
@@ -45,6 +48,24 @@ def get_model_label(model):
     return '{}.{}'.format(get_model_applabel(model), get_model_name(model))
 
 
+def get_reference_label(reference, relative_to):
+    """
+    Label of a model class or of a lazy reference string ("app.Model", "Model" or "self")
+    as found in relation fields whose target isn't loaded.
+    """
+    if not isinstance(reference, str):
+        return get_model_label(reference)
+    if reference == RECURSIVE_RELATIONSHIP_CONSTANT:
+        return get_model_label(relative_to)
+    if '.' not in reference:
+        return '{}.{}'.format(get_model_applabel(relative_to), reference)
+    return reference
+
+
+def get_model_db_table(model):
+    return model._meta.db_table
+
+
 def get_full_model_list(apps, exclude_models=set()):
     result = set()
     for app in apps:
@@ -68,6 +89,11 @@ def is_model_abstract(model):
     return model._meta.abstract
 
 
+def is_model_concrete(model):
+    # has a table of its own
+    return not (model._meta.abstract or model._meta.proxy)
+
+
 def get_model_abstract_fields(model):
     result = []
     for e in model.__bases__:
@@ -92,10 +118,39 @@ def does_m2m_auto_create_table(m2m_field):
     return False
 
 
+def is_lazy_relation(field):
+    # relation to a model which isn't loaded, target is still a string
+    return field.is_relation and isinstance(field.related_model, str)
+
+
 def get_relation_target_field(rel_field):
+    if is_lazy_relation(rel_field):
+        return None
     return rel_field.target_field
 
 
+def get_relation_on_delete(rel_field):
+    on_delete = getattr(rel_field.remote_field, 'on_delete', None)
+    if on_delete is None:
+        return None
+    if on_delete.__name__ == 'set_on_delete':  # models.SET(value)
+        return 'SET'
+    return on_delete.__name__
+
+
+def get_relation_through_table(rel_field):
+    if isinstance(rel_field, ManyToManyField) and does_m2m_auto_create_table(rel_field):
+        return rel_field.m2m_db_table()
+    return None
+
+
+def get_field_db_type(field):
+    if is_lazy_relation(field):
+        # column type follows target primary key
+        return None
+    return field.db_type(connection)
+
+
 def prepare_field(field):
     return {
         'name': field.name,
@@ -104,6 +159,10 @@ def prepare_field(field):
         'primary_key': field.primary_key,
         'nullable': field.null,
         'unique': field.unique,
+        'db_type': get_field_db_type(field),
+        'max_length': field.max_length,
+        'max_digits': getattr(field, 'max_digits', None),
+        'decimal_places': getattr(field, 'decimal_places', None),
     }
 
 
@@ -128,6 +187,57 @@ def prepare_model_fields(model):
     return result
 
 
+def get_field_columns(model, field_names):
+    # Meta.indexes fields may be prefixed with "-" for descending order
+    return [get_model_field_by_name(model, name.lstrip('-')).column for name in field_names]
+
+
+def prepare_index(name, columns, unique, kind, partial=False):
+    return {
+        'name': name,
+        'columns': columns,
+        'unique': unique,
+        'kind': kind,
+        'partial': partial,  # has condition or expressions, doesn't cover plain lookups
+    }
+
+
+def prepare_model_indexes(model):
+    """
+    Indexes in the order of their origin: primary key, unique fields, unique_together,
+    UniqueConstraint, Meta.indexes, db_index fields.
+    """
+    from django.db.models import UniqueConstraint
+
+    result = []
+    opts = model._meta
+    fields = get_model_local_fields(model)
+
+    pk = get_model_pk_field(model)
+    if pk is not None and pk.column:
+        result.append(prepare_index(None, [pk.column], True, 'primary_key'))
+    for field in fields:
+        if field.unique and not field.primary_key:
+            result.append(prepare_index(None, [field.column], True, 'unique'))
+    for names in opts.unique_together:
+        result.append(prepare_index(None, get_field_columns(model, names), True, 'unique_together'))
+    for constraint in opts.constraints:
+        if isinstance(constraint, UniqueConstraint) and constraint.fields:
+            result.append(prepare_index(
+                constraint.name, get_field_columns(model, constraint.fields), True, 'constraint',
+                partial=constraint.condition is not None or bool(getattr(constraint, 'expressions', ())),
+            ))
+    for index in opts.indexes:
+        result.append(prepare_index(
+            index.name, get_field_columns(model, index.fields), False, 'index',
+            partial=index.condition is not None or bool(getattr(index, 'expressions', ())),
+        ))
+    for field in fields:
+        if field.db_index and not field.unique:
+            result.append(prepare_index(None, [field.column], False, 'db_index'))
+    return result
+
+
 def get_relation_base(start_label, end_label, dotted=False):
     color = '000000'
     if start_label == '1' and end_label == '1':
@@ -145,7 +255,8 @@ def get_relation_base(start_label, end_label, dotted=False):
 
 
 def prepare_relation(field, start_label, end_label, dotted=False):
-    # TODO: handle lazy-relationships
+    # end_obj stays a string for lazy relationships whose target isn't loaded,
+    # get_reference_label handles both for diagram.DataPipeline.iter_model_relations
 
     assert field.is_relation
 
@@ -159,6 +270,7 @@ def prepare_relation(field, start_label, end_label, dotted=False):
         'end_obj': field.related_model,
         'start_field': field,
         'end_field': get_relation_target_field(field),
+        'on_delete': get_relation_on_delete(field),
     })
     return r
 
@@ -214,6 +326,8 @@ def prepare_model_inheritance(model):
             result.append({
                 'start_label': '',
                 'end_label': label,
+                # deleting parent row of multi-table inheritance deletes child row
+                'on_delete': 'CASCADE' if label == 'multi-table' else None,
                 'start_obj': model,
                 'end_obj': parent,
                 'dotted': True,
@@ -229,7 +343,9 @@ __all__ = (
     get_model_label,
     get_model_applabel,
     get_model_name,
+    get_model_db_table,
     prepare_model_fields,
+    prepare_model_indexes,
     prepare_model_relations,
     prepare_model_inheritance,
 )
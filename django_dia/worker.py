@@ -0,0 +1,65 @@
+"""
+Prepares diagram data of a single django project and prints it as JSON.
+Runs in a separate process since django settings can't be switched in place:
+
+    python -m django_dia.worker myproject.settings [-a] [-e] [appname ...]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+
+def get_parser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('settings')
+    parser.add_argument('appnames', nargs='*')
+    parser.add_argument('--all-applications', '-a', action='store_true', dest='all_applications')
+    parser.add_argument('--inheritance', '-e', action='store_true', dest='inheritance')
+    parser.add_argument('--exclude-models', '-X', action='store', dest='exclude_models', default='')
+    parser.add_argument('--seed', action='store', type=int, dest='seed')
+    parser.add_argument('--missing-relations', action='store', dest='missing')
+    return parser
+
+
+def make_args(settings, appnames=(), all_applications=False, inheritance=False, exclude_models=(), seed=None,
+              missing=None):
+    args = [settings] + list(appnames)
+    if all_applications:
+        args.append('-a')
+    if inheritance:
+        args.append('-e')
+    if exclude_models:
+        args.extend(('-X', ','.join(sorted(exclude_models))))
+    if seed is not None:
+        args.extend(('--seed', str(seed)))
+    if missing:
+        args.extend(('--missing-relations', missing))
+    return args
+
+
+def main(argv):
+    options = get_parser().parse_args(argv)
+    os.environ['DJANGO_SETTINGS_MODULE'] = options.settings
+
+    import django
+    django.setup()
+
+    from . import diagram, utils
+
+    model_list = utils.get_full_model_list(
+        utils.get_target_apps(options.appnames, allapps=options.all_applications),
+        exclude_models=set(filter(None, options.exclude_models.split(','))),
+    )
+    dropped = []
+    tables, rels = diagram.prepare_data(
+        model_list,
+        inheritance=options.inheritance, seed=options.seed,
+        missing=options.missing or diagram.MISSING_DROP, dropped=dropped,
+    )
+    sys.stdout.write(json.dumps({'tables': tables, 'relations': rels, 'dropped': dropped}, default=str, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -34,9 +34,10 @@ setup(
     ],
     keywords='django dia model diagram',
     packages=['django_dia', 'django_dia.management', 'django_dia.management.commands'],
-    package_data={'django_dia': ['empty.xml']},
+    package_data={'django_dia': ['empty.xml', 'viewer.html']},
     install_requires=['Django'],
     extras_require={
-        'tests': ['pytest']
+        'tests': ['pytest'],
+        'numpy': ['numpy'],
     }
 )
@@ -0,0 +1,163 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Automobile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100)),
+                ('year', models.IntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Pet',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Circle',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('area', models.FloatField()),
+                ('radius', models.FloatField()),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Language',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=10, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Person',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_name', models.CharField(max_length=30, verbose_name='First name of a person')),
+                ('last_name', models.CharField(max_length=30)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Picture',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.CharField(max_length=100)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Post',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content', models.TextField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Square',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('area', models.FloatField()),
+                ('side', models.FloatField()),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Cat',
+            fields=[
+                ('pet_ptr', models.OneToOneField(
+                    auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True,
+                    primary_key=True, serialize=False, to='anyapp.pet')),
+                ('meows', models.IntegerField()),
+            ],
+            bases=('anyapp.pet',),
+        ),
+        migrations.CreateModel(
+            name='Dog',
+            fields=[
+                ('pet_ptr', models.OneToOneField(
+                    auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True,
+                    primary_key=True, serialize=False, to='anyapp.pet')),
+                ('woofs', models.IntegerField()),
+            ],
+            bases=('anyapp.pet',),
+        ),
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('parent', models.ForeignKey(
+                    null=True, on_delete=django.db.models.deletion.CASCADE, to='anyapp.category')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Engine',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100)),
+                ('automobile', models.OneToOneField(
+                    on_delete=django.db.models.deletion.CASCADE, to='anyapp.automobile')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Friend',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('friends', models.ManyToManyField(to='anyapp.friend')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Like',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('picture', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='anyapp.picture')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Comment',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content', models.TextField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='anyapp.post')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Poster',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('likes', models.ManyToManyField(through='anyapp.Like', to='anyapp.picture')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='like',
+            name='poster',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='anyapp.poster'),
+        ),
+        migrations.CreateModel(
+            name='Speaker',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('language', models.ManyToManyField(to='anyapp.language')),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('anyapp', '0002_shops'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Customer',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.CharField(db_index=True, max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.CharField(db_index=True, max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='anyapp.customer')),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['number'], name='order_number_idx'),
+                    models.Index(fields=['customer', '-created_at'], name='order_customer_created_idx'),
+                ],
+                'constraints': [
+                    models.UniqueConstraint(fields=('number', 'created_at'), name='order_number_created_uniq'),
+                ],
+                'unique_together': {('customer', 'number')},
+            },
+        ),
+    ]
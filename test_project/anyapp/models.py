@@ -130,3 +130,26 @@ class GroceryGoods(AbstractGoods):
 class ProxyShop(Shop):
     class Meta:
         proxy = True
+
+
+# indexes
+
+
+class Customer(models.Model):
+    email = models.CharField(max_length=100, unique=True, db_index=True)
+
+
+class Order(models.Model):
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
+    number = models.CharField(max_length=20, db_index=True)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = [('customer', 'number')]
+        indexes = [
+            models.Index(fields=['number'], name='order_number_idx'),
+            models.Index(fields=['customer', '-created_at'], name='order_customer_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['number', 'created_at'], name='order_number_created_uniq'),
+        ]
@@ -1,7 +1,62 @@
 import os
 
 import django
+import pytest
 
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_project.settings')
 django.setup()
+
+
+@pytest.fixture
+def anyapp_db():
+    from django.apps import apps
+    from django.db import connection
+
+    models = [m for m in apps.get_app_config('anyapp').get_models() if not m._meta.proxy]
+    with connection.schema_editor() as editor:
+        for model in models:
+            editor.create_model(model)
+    yield
+    with connection.schema_editor() as editor:
+        for model in reversed(models):
+            editor.delete_model(model)
+
+
+@pytest.fixture
+def make_table():
+    """
+    Factory of minimal prepared tables: make_table(i, app='app', **overrides).
+    """
+    def make(i, app='app', **kwargs):
+        return dict({
+            'id': i, 'label': '{}.T{}'.format(app, i), 'app_label': app, 'db_table': 't{}'.format(i),
+            'color': 'FFFFFF',
+        }, **kwargs)
+    return make
+
+
+@pytest.fixture
+def make_fk():
+    """
+    Factory of prepared foreign key relations: make_fk(start_id, end_id, nullable=False, on_delete='CASCADE').
+    """
+    def make(start, end, nullable=False, on_delete='CASCADE'):
+        return {
+            'start_obj_id': start, 'end_obj_id': end, 'start_field_name': 'fk{}'.format(end),
+            'start_label': 'n', 'end_label': '1', 'dotted': False, 'nullable': nullable, 'on_delete': on_delete,
+            'color': '000000',
+        }
+    return make
+
+
+@pytest.fixture
+def all_data():
+    """
+    Prepared tables and relations of every installed application.
+    """
+    from django_dia import diagram, utils
+
+    return diagram.prepare_data(
+        utils.get_full_model_list(utils.get_target_apps((), allapps=True)),
+        inheritance=True, seed=0)
@@ -0,0 +1,56 @@
+import pytest
+from django.db import DatabaseError
+
+from django_dia import cardinality, diagram
+from test_project.anyapp import models as anyapp_models
+
+
+def test_cardinality_stats():
+    m = cardinality.Cardinality.from_histogram({1: 99, 50: 1})
+    assert m.parents == 100
+    assert m.avg == 1.49
+    assert m.p99 == 1
+    m = cardinality.Cardinality.from_histogram({3: 1, 1: 1, 2: 1})
+    assert (m.avg, m.p99) == (2.0, 3)
+    # parents without children
+    m = cardinality.Cardinality.from_histogram({4: 2}, parents=200)
+    assert (m.parents, m.avg, m.p99) == (200, 0.04, 0)
+    assert cardinality.Cardinality.from_histogram({}).avg == 0.0
+
+
+def test_measure_cardinality(anyapp_db):
+    posts = [anyapp_models.Post.objects.create(content=str(i)) for i in range(5)]
+    for post, children in zip(posts, [1, 2, 6, 0, 0]):
+        for i in range(children):
+            anyapp_models.Comment.objects.create(post=post, content=str(i))
+    tables, rels = diagram.prepare_data([
+        anyapp_models.Post, anyapp_models.Comment, anyapp_models.Language, anyapp_models.Speaker,
+    ])
+    measures = cardinality.measure_cardinality(tables, rels, jobs=2)
+    assert len(measures) == 1  # many-to-many isn't measured
+    (rel_id, m), = measures.items()
+    assert (m.parents, m.avg, m.p99) == (5, 1.8, 6)
+
+    sampled = cardinality.measure_cardinality(tables, rels, sample=4)[rel_id]
+    assert sampled.avg * sampled.parents == 4
+
+    cardinality.apply_cardinality(rels, measures)
+    rel = next(r for r in rels if r['id'] == rel_id)
+    assert rel['start_label'] == 'n (avg 1.8, p99 6)'
+    assert rel['line_width'] == cardinality.MAX_LINE_WIDTH
+    lines = list(cardinality.report_lines(tables, rels, measures))
+    assert lines == ['anyapp.Comment.post -> anyapp.Post: 5 parents, avg 1.8, p99 6']
+
+
+def test_measure_cardinality_missing_table(anyapp_db, monkeypatch):
+    tables, rels = diagram.prepare_data([anyapp_models.Post, anyapp_models.Comment])
+    comment = next(t for t in tables if t['name'] == 'Comment')
+
+    comment['db_table'] = 'not_created_yet'
+    assert cardinality.measure_cardinality(tables, rels) == {}
+
+    # other errors aren't hidden
+    comment['db_table'] = anyapp_models.Comment._meta.db_table
+    monkeypatch.setattr(cardinality, 'get_histogram_query', lambda *args: 'SELECT COUNT(*) FROM')
+    with pytest.raises(DatabaseError):
+        cardinality.measure_cardinality(tables, rels)
@@ -0,0 +1,69 @@
+from django_dia import cascade, diagram
+from test_project.anyapp import models as anyapp_models
+
+
+def test_analyze_cascade(make_table, make_fk):
+    tables = [make_table(i) for i in range(6)]
+    rels = [
+        make_fk(1, 0),
+        make_fk(2, 1),
+        make_fk(2, 0),
+        make_fk(3, 1, on_delete='SET_NULL'),
+        make_fk(4, 2, on_delete='PROTECT'),
+        make_fk(0, 5),
+    ]
+    result = cascade.analyze_cascade(tables, rels, 0, row_counts={0: 10, 1: 50, 2: 100, 5: 1})
+    assert result.depth == {0: 0, 1: 1, 2: 1}
+    assert result.updated == [rels[3]]
+    assert result.protected == [rels[4]]
+    # 5 children of T1 per T0 row, T2 reached directly (10 per T0 row)
+    assert result.estimated_rows == {0: 1.0, 1: 5.0, 2: 10.0}
+
+    cascade.apply_cascade_colors(tables, rels, result)
+    assert [t['color'] for t in tables] == [
+        cascade.ROOT_COLOR, cascade.DELETED_COLOR, cascade.DELETED_COLOR,
+        cascade.UPDATED_COLOR, cascade.PROTECTED_COLOR, cascade.UNAFFECTED_COLOR,
+    ]
+    lines = list(cascade.report_lines(result, tables))
+    assert lines[0] == 'Deleting app.T0 deletes rows of 2 model(s):'
+    assert '  app.T4.fk2 -> app.T2 (PROTECT)' in lines
+
+
+def test_cascade_inheritance():
+    tables, rels = diagram.prepare_data([anyapp_models.Pet, anyapp_models.Cat, anyapp_models.Dog], inheritance=True)
+    ids = {t['name']: t['id'] for t in tables}
+    result = cascade.analyze_cascade(tables, rels, ids['Pet'])
+    assert set(result.depth) == set(ids.values())
+    # parent row goes too, like Django's Collector does, rows of other subclasses stay
+    result = cascade.analyze_cascade(tables, rels, ids['Cat'], row_counts={ids['Pet']: 10, ids['Cat']: 2})
+    assert set(result.depth) == {ids['Cat'], ids['Pet']}
+    assert result.estimated_rows == {ids['Cat']: 1.0, ids['Pet']: 1.0}
+
+
+def test_cascade_parent_relations(make_table, make_fk):
+    # T1 and T2 are subclasses of T0, T3 references T0, T4 references T2
+    tables = [make_table(i) for i in range(5)]
+    rels = [
+        dict(make_fk(1, 0), end_label='multi-table'),
+        dict(make_fk(2, 0), end_label='multi-table'),
+        make_fk(3, 0),
+        make_fk(4, 2),
+    ]
+    result = cascade.analyze_cascade(tables, rels, 1)
+    assert set(result.depth) == {0, 1, 3}
+    # T0 also reached as a whole table: all its subclasses go
+    rels.append(make_fk(0, 3))
+    result = cascade.analyze_cascade(tables, rels, 1)
+    assert set(result.depth) == {0, 1, 2, 3, 4}
+
+
+def test_get_row_counts(anyapp_db):
+    post = anyapp_models.Post.objects.create(content='a')
+    anyapp_models.Comment.objects.create(post=post, content='b')
+    anyapp_models.Comment.objects.create(post=post, content='c')
+    tables, rels = diagram.prepare_data([anyapp_models.Post, anyapp_models.Comment, anyapp_models.AbstractShape])
+    counts = cascade.get_row_counts(tables)
+    ids = {t['name']: t['id'] for t in tables}
+    assert counts == {ids['Post']: 1, ids['Comment']: 2}
+    result = cascade.analyze_cascade(tables, rels, ids['Post'], row_counts=counts)
+    assert result.estimated_rows[ids['Comment']] == 2.0
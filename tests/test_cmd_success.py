@@ -1,7 +1,10 @@
+import json
 import xml.etree.ElementTree as ET
 from io import StringIO
 
+import pytest
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.core.checks import run_checks
 
 
@@ -31,3 +34,69 @@ def test_pretend():
     lines = call_cmd(all_applications=True, pretend=True, exclude_models='anyapp.Shop,anyapp.Cat').splitlines()
     assert len(lines) > 0
     assert 'anyapp.Shop' not in lines
+
+
+def test_layers_by_app():
+    line = call_cmd(all_applications=True, inheritance=True, layers_by_app=True, visible_apps='anyapp')
+    xml = ET.fromstring(line)
+    ns = {'dia': 'http://www.lysator.liu.se/~alla/dia/'}
+    layers = {layer.get('name'): layer for layer in xml.findall('./dia:layer', ns)}
+    assert 'Main' not in layers
+    assert layers['anyapp'].get('visible') == 'true'
+    assert layers['contenttypes'].get('visible') == 'false'
+    assert len([layer for layer in layers.values() if layer.get('active') == 'true']) == 1
+    assert len(layers['anyapp'].findall('./dia:object[@type=\'Database - Table\']', ns)) > 0
+
+
+def test_html_output():
+    page = call_cmd(all_applications=True, inheritance=True, format='html')
+    assert '/*DATA*/' not in page
+    data = json.loads(page.split('var DATA = ', 1)[1].split(';\n', 1)[0])
+    assert any(t[5] == 'Person' for t in data['tables'])
+    assert len(data['relations']) > 0
+
+
+def test_analysis_options():
+    for opts in (
+        {'analyze_cycles': True},
+        {'join_depth': 'anyapp.Comment'},
+        {'join_depth': 'all'},
+        {'cascade_from': 'anyapp.Post'},
+        {'suggest_partitions': 2},
+        {'row_width': True},
+    ):
+        err = StringIO()
+        line = call_cmd(all_applications=True, inheritance=True, stderr=err, **opts)
+        ET.fromstring(line)
+        assert err.getvalue()
+
+
+def test_cardinality(anyapp_db):
+    from test_project.anyapp.models import Comment, Post
+    post = Post.objects.create(content='a')
+    Comment.objects.create(post=post, content='b')
+    err = StringIO()
+    line = call_cmd(all_applications=True, cardinality=True, cardinality_sample=100, stderr=err)
+    assert 'n (avg 1.0, p99 1)' in line
+    assert 'anyapp.Comment.post -> anyapp.Post: 1 parents, avg 1.0, p99 1' in err.getvalue()
+
+
+def test_missing_relations():
+    err = StringIO()
+    call_cmd(all_applications=True, exclude_models='anyapp.Post', missing_relations='report', stderr=err)
+    assert 'anyapp.Comment.post -> anyapp.Post (1): target not in diagram' in err.getvalue()
+    line = call_cmd(all_applications=True, exclude_models='anyapp.Post', missing_relations='stub')
+    assert '#Post#' in line
+
+
+def test_stream():
+    assert call_cmd(all_applications=True, inheritance=True, seed=2, stream=True) == \
+        call_cmd(all_applications=True, inheritance=True, seed=2)
+    with pytest.raises(CommandError):
+        call_cmd(all_applications=True, stream=True, analyze_cycles=True)
+
+
+@pytest.mark.parametrize('k', [0, -1])
+def test_suggest_partitions_invalid(k):
+    with pytest.raises(CommandError):
+        call_cmd(all_applications=True, suggest_partitions=k)
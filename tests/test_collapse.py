@@ -0,0 +1,27 @@
+from django_dia import collapse
+
+
+def test_get_collapsed_apps(all_data):
+    tables, rels = all_data
+    assert collapse.get_collapsed_apps(tables, collapse={'anyapp', 'unknown'}) == {'anyapp'}
+    assert collapse.get_collapsed_apps(tables, collapse_all_except={'anyapp'}) == {'contenttypes'}
+    assert collapse.get_collapsed_apps(tables) == set()
+
+
+def test_collapse_apps(all_data):
+    tables, rels = all_data
+    anyapp_count = len([t for t in tables if t['app_label'] == 'anyapp'])
+
+    ctables, crels = collapse.collapse_apps(tables, rels, {'anyapp'})
+    summary = [t for t in ctables if t['label'] == 'anyapp']
+    assert len(summary) == 1
+    assert summary[0]['fields'][0]['name'] == '{} models'.format(anyapp_count)
+    assert len(ctables) == len(tables) - anyapp_count + 1
+
+    ids = [t['id'] for t in ctables] + [r['id'] for r in crels]
+    assert len(ids) == len(set(ids))
+    table_ids = {t['id'] for t in ctables}
+    for r in crels:
+        assert r['start_obj_id'] in table_ids and r['end_obj_id'] in table_ids
+
+    assert collapse.collapse_apps(tables, rels, set()) == (tables, rels)
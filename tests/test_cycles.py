@@ -0,0 +1,44 @@
+from django_dia import cycles, diagram, graph
+from test_project.anyapp import models as anyapp_models
+
+
+def test_strongly_connected_components():
+    adjacency = {1: [(2, None)], 2: [(3, None)], 3: [(1, None), (4, None)], 4: [], 5: [(5, None)]}
+    components = graph.strongly_connected_components(adjacency)
+    assert sorted(map(sorted, components)) == [[1, 2, 3], [4], [5]]
+    assert components.index([4]) < [sorted(c) for c in components].index([1, 2, 3])
+
+
+def test_analyze_cycles(make_table, make_fk):
+    tables = [make_table(i) for i in range(5)]
+    rels = [
+        make_fk(1, 0),
+        make_fk(2, 1),
+        make_fk(1, 2, nullable=True),  # 1 <-> 2 cycle, breakable
+        make_fk(3, 4),
+        make_fk(4, 3),  # 3 <-> 4 cycle, no nullable fk
+    ]
+    analysis = cycles.analyze_cycles(tables, rels)
+    order = analysis.load_order
+    assert sorted(order) == [0, 1, 2, 3, 4]
+    assert order.index(0) < order.index(1) < order.index(2)
+    assert sorted(map(sorted, analysis.cycles)) == [[1, 2], [3, 4]]
+    assert analysis.deferred == [rels[2]]
+    assert [sorted(c) for c in analysis.unbreakable] == [[3, 4]]
+
+    cycles.apply_cycle_highlight(tables, rels, analysis)
+    assert tables[0]['color'] == 'FFFFFF'
+    assert tables[1]['color'] == cycles.CYCLE_COLOR
+    assert rels[2]['color'] == cycles.DEFERRED_RELATION_COLOR
+    lines = list(cycles.report_lines(analysis, tables))
+    assert '  app.T1.fk2 -> app.T2' in lines
+
+
+def test_self_reference():
+    tables, rels = diagram.prepare_data([anyapp_models.Category, anyapp_models.Post, anyapp_models.Comment])
+    analysis = cycles.analyze_cycles(tables, rels)
+    labels = {t['id']: t['label'] for t in tables}
+    assert [[labels[n] for n in c] for c in analysis.cycles] == [['anyapp.Category']]
+    assert [r['start_field_name'] for r in analysis.deferred] == ['parent']
+    order = [labels[n] for n in analysis.load_order]
+    assert order.index('anyapp.Post') < order.index('anyapp.Comment')
@@ -0,0 +1,71 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from django_dia import diagram, utils
+from test_project.anyapp import models as anyapp_models
+
+
+def get_model_list():
+    return utils.get_full_model_list(utils.get_target_apps((), allapps=True))
+
+
+def test_prepare_data_is_deterministic():
+    models = get_model_list()
+    assert diagram.prepare_data(models, seed=1) == diagram.prepare_data(list(models)[::-1], seed=1)
+    assert diagram.prepare_data(models, seed=1) != diagram.prepare_data(models, seed=2)
+
+
+def test_prepare_data_accepts_random_instance():
+    models = get_model_list()
+    assert diagram.prepare_data(models, seed=random.Random(5)) == diagram.prepare_data(models, seed=5)
+
+
+def test_render_diagram_in_threads():
+    models = get_model_list()
+    expected = diagram.render_diagram(models, seed=3, inheritance=True)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(
+            lambda _: diagram.render_diagram(models, seed=3, inheritance=True), range(8)))
+    assert results == [expected] * 8
+
+
+def test_prepare_data_missing_relations():
+    models = [anyapp_models.Comment, anyapp_models.Cat, anyapp_models.Speaker, anyapp_models.Language]
+    dropped = []
+    tables, rels = diagram.prepare_data(models, inheritance=True, dropped=dropped)
+    assert len(tables) == 4
+    # many-to-many relation is kept, it has no column to connect to
+    assert [(r['start_field_name'], r['end_label']) for r in rels] == [('language', 'n')]
+    assert dropped == [
+        {'start': 'anyapp.Cat', 'field': None, 'target': 'anyapp.Pet', 'end_label': 'multi-table'},
+        {'start': 'anyapp.Comment', 'field': 'post', 'target': 'anyapp.Post', 'end_label': '1'},
+    ]
+    assert list(diagram.dropped_report_lines(dropped))[-1] == 'Dropped relations: 2'
+
+    tables, rels = diagram.prepare_data(models, inheritance=True, missing=diagram.MISSING_STUB)
+    stubs = {t['label']: t for t in tables if t.get('stub')}
+    assert sorted(stubs) == ['anyapp.Pet', 'anyapp.Post']
+    assert stubs['anyapp.Post']['fields'] == []
+    assert len(rels) == 3
+    assert {r['end_obj_id'] for r in rels} >= {t['id'] for t in stubs.values()}
+    diagram.dia_xml(tables, rels)
+
+
+def test_stream_diagram():
+    models = [m for m in get_model_list() if m is not anyapp_models.Post]
+    dropped = []
+    chunks = list(diagram.stream_diagram(models, seed=4, inheritance=True, dropped=dropped))
+    assert len(chunks) > len(models)
+    assert b''.join(chunks) == diagram.render_diagram(models, seed=4, inheritance=True)
+    assert [d['start'] for d in dropped] == ['anyapp.Comment']
+
+
+def test_pipeline_keeps_only_references():
+    pipeline = diagram.DataPipeline(get_model_list(), seed=0)
+    tables = pipeline.tables()
+    next(tables)
+    assert len(pipeline.refs) == 1
+    for _ in tables:
+        pass
+    assert all(isinstance(ref, diagram.TableRef) for ref in pipeline.refs.values())
+    assert len(list(pipeline.relations())) > 0
@@ -0,0 +1,62 @@
+import json
+
+from django_dia import diagram, diff
+from test_project.anyapp import models as anyapp_models
+
+
+def make_graph(model_list):
+    tables, rels = diagram.prepare_data(model_list)
+    data = json.loads(diff.dump_graph(tables, rels))
+    return diff.Graph(data['tables'], data['relations'])
+
+
+def test_no_changes():
+    models = [anyapp_models.Post, anyapp_models.Comment, anyapp_models.Person]
+    schema_diff = diff.diff_graphs(make_graph(models), make_graph(models[::-1]))
+    assert schema_diff.is_empty()
+
+
+def test_diff_on_delete():
+    models = [anyapp_models.Post, anyapp_models.Comment]
+    new = make_graph(models)
+    for r in new.rels:
+        r['on_delete'] = 'PROTECT'
+    new = diff.Graph(new.tables, new.rels)
+    assert diff.diff_graphs(make_graph(models), new).modified == ['anyapp.Comment']
+
+
+def test_diff_indexes():
+    models = [anyapp_models.Post, anyapp_models.Comment]
+    new = make_graph(models)
+    post = new.by_label['anyapp.Post']
+    post['indexes'] = post['indexes'] + [dict(post['indexes'][0], name='post_content_idx', columns=['content'])]
+    new = diff.Graph(new.tables, new.rels)
+    assert diff.diff_graphs(make_graph(models), new).modified == ['anyapp.Post']
+
+
+def test_diff_graphs():
+    old = make_graph([anyapp_models.Post, anyapp_models.Comment, anyapp_models.Person, anyapp_models.Pet])
+    new_tables, new_rels = diagram.prepare_data([
+        anyapp_models.Post, anyapp_models.Comment, anyapp_models.Person, anyapp_models.Shop])
+    for t in new_tables:
+        if t['name'] == 'Post':
+            t['fields'].append(dict(t['fields'][-1], name='title'))
+    new = diff.Graph(new_tables, new_rels)
+
+    schema_diff = diff.diff_graphs(old, new)
+    assert schema_diff.added == ['anyapp.Shop']
+    assert schema_diff.removed == ['anyapp.Pet']
+    assert schema_diff.modified == ['anyapp.Post']
+    assert '~ anyapp.Post' in list(schema_diff.summary_lines())
+
+    tables, rels = diff.make_diff_data(old, new, schema_diff)
+    colors = {t['label']: t['color'] for t in tables}
+    assert colors == {
+        'anyapp.Shop': diff.ADDED_COLOR,
+        'anyapp.Pet': diff.REMOVED_COLOR,
+        'anyapp.Post': diff.MODIFIED_COLOR,
+        'anyapp.Comment': diff.CONTEXT_COLOR,
+    }
+    assert len(rels) == 1
+    ids = {t['id'] for t in tables}
+    assert rels[0]['start_obj_id'] in ids and rels[0]['end_obj_id'] in ids
@@ -0,0 +1,59 @@
+import xml.etree.ElementTree as ET
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from django_dia import diagram, export
+from test_project.anyapp import models as anyapp_models
+
+
+def prepare():
+    return diagram.prepare_data([
+        anyapp_models.Post, anyapp_models.Comment,
+        anyapp_models.Category,
+        anyapp_models.Pet, anyapp_models.Cat,
+    ], inheritance=True)
+
+
+def test_to_csr():
+    tables, rels = prepare()
+    graph = export.to_csr(tables, rels)
+    assert len(graph.indptr) == len(tables) + 1
+    assert graph.indptr[-1] == len(graph.indices) == len(rels)
+    labels = graph.nodes['label']
+    edges = sorted(
+        (labels[a], labels[b], graph.edges['kind'][e], graph.edges['field'][e])
+        for e, a, b in graph.iter_edges()
+    )
+    assert edges == [
+        ('anyapp.Cat', 'anyapp.Pet', 'multi-table', None),
+        ('anyapp.Category', 'anyapp.Category', export.KIND_FOREIGN_KEY, 'parent'),
+        ('anyapp.Comment', 'anyapp.Post', export.KIND_FOREIGN_KEY, 'post'),
+    ]
+    assert sum(graph.edges['nullable']) == 1
+    assert list(graph.sources) == [a for _, a, _ in graph.iter_edges()]
+
+
+def test_as_numpy():
+    np = pytest.importorskip('numpy')
+    tables, rels = prepare()
+    graph = export.to_csr(tables, rels).as_numpy()
+    assert graph.indices.dtype == np.int64
+    assert graph.edges['nullable'].dtype == bool
+
+
+def test_graphml():
+    tables, rels = prepare()
+    root = ET.fromstring(export.export_graph(tables, rels))
+    ns = {'g': 'http://graphml.graphdrawing.org/xmlns'}
+    assert len(root.findall('./g:graph/g:node', ns)) == len(tables)
+    assert len(root.findall('./g:graph/g:edge', ns)) == len(rels)
+
+
+def test_export_graph_command(tmp_path):
+    outfile = str(tmp_path / 'scheme.tsv')
+    call_command('make_diagram', 'anyapp', stdout=StringIO(), export_graph=outfile)
+    with open(outfile) as f:
+        lines = f.read().splitlines()
+    assert 'anyapp.Comment\tanyapp.Post\tforeign_key\t0\tpost' in lines
@@ -0,0 +1,82 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from django_dia import diagram, history
+
+
+@pytest.fixture
+def loader():
+    return history.get_loader()
+
+
+def get_labels(tables):
+    return {t['label'] for t in tables}
+
+
+def test_parse_migration_target(loader):
+    assert history.parse_migration_target(loader, 'anyapp:0001') == ('anyapp', '0001_initial')
+    with pytest.raises(ValueError):
+        history.parse_migration_target(loader, 'anyapp')
+    with pytest.raises(KeyError):
+        history.parse_migration_target(loader, 'anyapp:0100')
+
+
+def test_prepare_data_at(loader):
+    tables, rels = history.prepare_data_at(loader, ('anyapp', '0001_initial'), app_labels={'anyapp'})
+    labels = get_labels(tables)
+    assert 'anyapp.Person' in labels
+    assert 'anyapp.Shop' not in labels
+    assert len(rels) > 0
+
+
+def test_iter_history_data(loader):
+    points = list(history.iter_history_data(loader, app_labels={'anyapp'}, seed=0))
+    assert [node for node, data in points] == [
+        ('anyapp', '0001_initial'), ('anyapp', '0002_shops'), ('anyapp', '0003_orders')]
+    first, second, third = [get_labels(tables) for node, (tables, rels) in points]
+    assert second - first == {'anyapp.Shop', 'anyapp.GroceryGoods', 'anyapp.ProxyShop'}
+    assert third - second == {'anyapp.Customer', 'anyapp.Order'}
+
+    tables, rels = history.prepare_data_at(loader, ('anyapp', '0003_orders'), app_labels={'anyapp'}, seed=0)
+    assert points[-1][1] == (tables, rels)
+
+
+def test_history_missing_relations(loader):
+    tables, rels = history.prepare_data_at(
+        loader, ('anyapp', '0003_orders'), app_labels={'anyapp'}, exclude_models={'anyapp.Post'},
+        missing=diagram.MISSING_STUB)
+    assert [t['label'] for t in tables if t.get('stub')] == ['anyapp.Post']
+
+    dropped = []
+    counts = [
+        len(dropped) for node, data in history.iter_history_data(
+            loader, app_labels={'anyapp'}, exclude_models={'anyapp.Post'}, dropped=dropped)
+    ]
+    assert len(counts) == 3 and all(counts)
+    assert {d['target'] for d in dropped} == {'anyapp.Post'}
+
+
+def test_command_at_migration():
+    out = StringIO()
+    call_command('make_diagram', 'anyapp', at_migration='anyapp:0001', pretend=True, stdout=out)
+    lines = out.getvalue().splitlines()
+    assert 'anyapp.Person' in lines
+    assert 'anyapp.Shop' not in lines
+
+    with pytest.raises(CommandError):
+        call_command('make_diagram', 'anyapp', at_migration='anyapp:9999', stdout=StringIO())
+
+    err = StringIO()
+    call_command('make_diagram', 'anyapp', at_migration='anyapp:0001', exclude_models='anyapp.Post',
+                 missing_relations='report', stdout=StringIO(), stderr=err)
+    assert '-> anyapp.Post' in err.getvalue()
+
+
+def test_command_history(tmp_path):
+    prefix = str(tmp_path / 'scheme')
+    call_command('make_diagram', 'anyapp', history=True, outputfile=prefix, stdout=StringIO(), stderr=StringIO())
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        'scheme_anyapp_0001_initial.dia', 'scheme_anyapp_0002_shops.dia', 'scheme_anyapp_0003_orders.dia']
@@ -0,0 +1,69 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from django_dia import diagram, indexes, utils
+from test_project.anyapp import models as anyapp_models
+
+
+def test_prepare_model_indexes():
+    data = utils.prepare_model_indexes(anyapp_models.Order)
+    assert [(i['kind'], i['columns'], i['unique']) for i in data] == [
+        ('primary_key', ['id'], True),
+        ('unique_together', ['customer_id', 'number'], True),
+        ('constraint', ['number', 'created_at'], True),
+        ('index', ['number'], False),
+        ('index', ['customer_id', 'created_at'], False),
+        ('db_index', ['customer_id'], False),
+        ('db_index', ['number'], False),
+    ]
+    # unique field has no separate db_index
+    assert [i['kind'] for i in utils.prepare_model_indexes(anyapp_models.Customer)] == ['primary_key', 'unique']
+
+
+def make_index(columns, kind='index', unique=False, partial=False):
+    return utils.prepare_index(None, columns, unique, kind, partial=partial)
+
+
+def test_find_covering():
+    pk = make_index(['id'], 'primary_key', unique=True)
+    uq = make_index(['id'], 'unique', unique=True)
+    ab = make_index(['a', 'b'])
+    a = make_index(['a'])
+    a_partial = make_index(['a', 'b', 'c'], partial=True)
+    b = make_index(['b'])
+    items = [pk, uq, ab, a, a_partial, b]
+    assert indexes.find_covering(items, 0) == (None, None)
+    assert indexes.find_covering(items, 1) == (pk, indexes.DUPLICATE)
+    assert indexes.find_covering(items, 2) == (None, None)  # partial index doesn't cover
+    assert indexes.find_covering(items, 3) == (ab, indexes.PREFIX)
+    assert indexes.find_covering(items, 5) == (None, None)
+
+
+def test_audit_redundant_indexes():
+    tables, rels = diagram.prepare_data([anyapp_models.Customer, anyapp_models.Order])
+    findings = indexes.audit_redundant_indexes(tables)
+    assert [(f.table['name'], f.index['kind'], f.index['columns'], f.reason) for f in findings] == [
+        ('Order', 'index', ['number'], indexes.PREFIX),
+        ('Order', 'db_index', ['customer_id'], indexes.PREFIX),
+        ('Order', 'db_index', ['number'], indexes.DUPLICATE),
+    ]
+    indexes.apply_index_comments(tables, findings)
+    order = next(t for t in tables if t['name'] == 'Order')
+    assert order['color'] == indexes.REDUNDANT_COLOR
+    assert order['comment'].splitlines()[:4] == [
+        'PK (id)',
+        'UQ (customer_id, number)',
+        'UQ (number, created_at) order_number_created_uniq',
+        '! IX (number) order_number_idx',
+    ]
+    lines = list(indexes.report_lines(findings))
+    assert lines[1] == 'anyapp.Order: IX (customer_id) is a prefix of UQ (customer_id, number)'
+    assert lines[-1] == 'Redundant indexes: 3'
+
+
+def test_audit_command():
+    out, err = StringIO(), StringIO()
+    call_command('make_diagram', 'anyapp', audit_redundant_indexes=True, stdout=out, stderr=err)
+    assert 'Redundant indexes: 3' in err.getvalue()
+    assert '! IX (number) order_number_idx' in out.getvalue()
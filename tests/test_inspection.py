@@ -0,0 +1,48 @@
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from django_dia import diagram, inspection, utils
+
+
+def make_xml(**kwargs):
+    model_list = utils.get_full_model_list(utils.get_target_apps((), allapps=True))
+    tables, rels = diagram.prepare_data(model_list, inheritance=True, seed=0)
+    return tables, rels, diagram.dia_xml(tables, rels, **kwargs)
+
+
+def test_inspect_diagram():
+    tables, rels, xml = make_xml()
+    seen = []
+    report = inspection.inspect_diagram(BytesIO(xml), on_table=lambda name, pos: seen.append(name))
+    assert report.tables == len(tables)
+    assert report.fields == sum(len(t['fields']) for t in tables)
+    assert report.relations == len(rels)
+    assert report.is_valid
+    assert sorted(seen) == sorted(t['name'] for t in tables)
+
+
+def test_inspect_broken_diagram():
+    tables, rels, xml = make_xml()
+    xml = xml.replace(b'id="O1"', b'id="O0"')
+    report = inspection.inspect_diagram(BytesIO(xml))
+    assert report.duplicate_ids == ['O0']
+    assert not report.is_valid
+
+
+def test_inspect_diagram_command(tmp_path):
+    outfile = str(tmp_path / 'scheme.dia')
+    call_command('make_diagram', all_applications=True, inheritance=True, layers_by_app=True,
+                 outputfile=outfile, stdout=StringIO())
+    out = StringIO()
+    call_command('inspect_diagram', outfile, list_tables=True, stdout=out)
+    lines = out.getvalue().splitlines()
+    assert any(line.startswith('Person ') for line in lines)
+    assert 'Relations: 0' not in lines
+
+    broken = tmp_path / 'broken.dia'
+    broken.write_bytes(make_xml()[2].replace(b'to="O1"', b'to="O100500"'))
+    with pytest.raises(CommandError):
+        call_command('inspect_diagram', str(broken), stdout=StringIO())
@@ -0,0 +1,48 @@
+import pytest
+
+from django_dia import diagram, graph, joindepth
+from test_project.anyapp import models as anyapp_models
+
+
+@pytest.fixture
+def chain_data(make_table, make_fk):
+    tables = [make_table(i) for i in range(6)]
+    rels = [make_fk(0, 1), make_fk(1, 2), make_fk(2, 3), make_fk(0, 3), make_fk(4, 0)]
+    return tables, rels
+
+
+def test_build_csr_and_bfs(chain_data):
+    tables, rels = chain_data
+    ids, id_to_index, indptr, indices = graph.build_csr(tables, [(r['start_obj_id'], r['end_obj_id']) for r in rels])
+    assert list(indices[indptr[0]:indptr[1]]) == [1, 3]
+    distance, parent = graph.bfs(indptr, indices, [4])
+    assert list(distance) == [1, 2, 3, 2, 0, -1]
+    assert parent[3] == 0
+
+
+def test_analyze_join_depth(chain_data):
+    tables, rels = chain_data
+    result = joindepth.analyze_join_depth(tables, rels, [0])
+    assert result.depth == {0: 0, 1: 1, 2: 2, 3: 1}
+    assert result.paths[2] == [0, 1, 2]
+    assert result.longest_chains == [[0, 1, 2]]
+
+    joindepth.apply_depth_colors(tables, rels, result)
+    assert tables[5]['color'] == joindepth.UNREACHABLE_COLOR
+    assert [r.get('line_width') for r in rels] == [joindepth.CHAIN_LINE_WIDTH] * 2 + [None] * 3
+    lines = list(joindepth.report_lines(result, tables))
+    assert lines[0] == '   2 app.T2: app.T0 -> app.T1 -> app.T2'
+
+
+def test_analyze_all_pairs(chain_data):
+    tables, rels = chain_data
+    result = joindepth.analyze_all_pairs(tables, rels)
+    assert result.depth == {0: 2, 1: 2, 2: 1, 3: 0, 4: 3, 5: 0}
+    assert result.longest_chains == [[4, 0, 1, 2]]
+
+
+def test_join_depth_models():
+    tables, rels = diagram.prepare_data([anyapp_models.Like, anyapp_models.Poster, anyapp_models.Picture])
+    root = [t['id'] for t in tables if t['name'] == 'Like']
+    result = joindepth.analyze_join_depth(tables, rels, root)
+    assert sorted(result.depth.values()) == [0, 1, 1]
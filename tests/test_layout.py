@@ -0,0 +1,111 @@
+import random
+import time
+
+from django_dia import diagram, layout
+from test_project.anyapp import models as anyapp_models
+
+
+def brute_force_crossings(segments):
+    return sum(
+        layout.segments_cross(s, t)
+        for i, s in enumerate(segments)
+        for t in segments[i + 1:]
+    )
+
+
+def test_segments_cross():
+    assert layout.segments_cross((0, 0, 2, 2, 1, 2), (0, 2, 2, 0, 3, 4))
+    assert not layout.segments_cross((0, 0, 2, 2, 1, 2), (0, 2, 2, 0, 2, 4))  # shared table
+    assert not layout.segments_cross((0, 0, 1, 1, 1, 2), (2, 0, 3, 1, 3, 4))
+
+
+def make_random_segments(seed, tables=60, edges=150):
+    rng = random.Random(seed)
+    sizes = {i: (1, 1) for i in range(tables)}
+    positions = layout.random_layout(range(tables), rng)
+    edges = [(rng.randrange(tables), rng.randrange(tables)) for _ in range(edges)]
+    return layout.get_edge_segments(positions, sizes, edges)
+
+
+def test_count_crossings_matches_brute_force():
+    for seed in range(20):
+        segments = make_random_segments(seed)
+        assert layout.count_crossings(segments) == brute_force_crossings(segments)
+
+
+def test_count_crossings_aligned_tables():
+    # vertical and collinear connectors
+    segments = [(0, 0, 0, 10, 1, 2), (-5, 5, 5, 5, 3, 4), (0, 10, 0, 20, 2, 5), (-5, 10, 5, 10, 6, 7)]
+    assert layout.count_crossings(segments) == brute_force_crossings(segments) == 1
+
+
+def test_count_crossings_estimate():
+    segments = make_random_segments(0, tables=200, edges=600)
+    exact = brute_force_crossings(segments)
+    assert exact > 1000
+    estimate = layout.count_crossings(segments, limit=1000)
+    assert abs(estimate - exact) < exact * 0.05
+
+
+def test_count_crossings_time():
+    # parallel connectors overlap in x and y but never cross
+    segments = [(i * 0.01, 0.0, i * 0.01 + 50, 50.0, 2 * i, 2 * i + 1) for i in range(9000)]
+    started = time.perf_counter()
+    assert layout.count_crossings(segments) == 0
+    assert time.perf_counter() - started < 5
+
+
+def test_search_layout():
+    tables, rels = diagram.prepare_data([
+        anyapp_models.Post, anyapp_models.Comment, anyapp_models.Like,
+        anyapp_models.Picture, anyapp_models.Poster,
+    ], seed=0)
+    positions = layout.search_layout(tables, rels, 5, seed=1)
+    assert positions == layout.search_layout(tables, rels, 5, seed=1)
+    assert positions != layout.search_layout(tables, rels, 5, seed=2)
+    assert set(positions) == {t['id'] for t in tables}
+    sizes = {t['id']: layout.get_table_size(t) for t in tables}
+    edges = [(r['start_obj_id'], r['end_obj_id']) for r in rels]
+    best = layout.score_layout(positions, sizes, edges)
+    for seed in layout.get_restart_seeds(5, seed=1):
+        assert best <= layout.run_restart(seed, sizes, edges)[0]
+    prepared = {t['id']: tuple(t['pos']) for t in tables}
+    assert best <= layout.score_layout(prepared, sizes, edges)
+    # without restarts prepared positions are kept
+    assert layout.search_layout(tables, rels, 0) == prepared
+
+
+def test_shelf_pack():
+    items = [('a', 4, 2), ('b', 2, 5), ('c', 3, 3), ('d', 1, 1)]
+    positions, (width, height) = layout.shelf_pack(items, 1)
+    assert set(positions) == {'a', 'b', 'c', 'd'}
+    assert positions['b'] == (0, 0)  # tallest first
+    rects = [(positions[k][0], positions[k][1], w, h) for k, w, h in items]
+    for i, (x1, y1, w1, h1) in enumerate(rects):
+        assert x1 + w1 <= width and y1 + h1 <= height
+        for x2, y2, w2, h2 in rects[i + 1:]:
+            assert x1 + w1 <= x2 or x2 + w2 <= x1 or y1 + h1 <= y2 or y2 + h2 <= y1
+    assert layout.shelf_pack([], 1) == ({}, (0, 0))
+
+
+def test_packed_layout():
+    from django_dia import utils
+    tables, rels = diagram.prepare_data(utils.get_full_model_list(utils.get_target_apps((), allapps=True)))
+    positions = layout.packed_layout(tables)
+    assert set(positions) == {t['id'] for t in tables}
+    assert positions == layout.packed_layout(tables[::-1])
+
+    boxes = {}
+    for t in tables:
+        x, y = positions[t['id']]
+        w, h = layout.get_table_size(t)
+        box = boxes.setdefault(t['app_label'], [x, y, x + w, y + h])
+        box[:] = [min(box[0], x), min(box[1], y), max(box[2], x + w), max(box[3], y + h)]
+        for other in tables:
+            if other['id'] <= t['id']:
+                continue
+            ox, oy = positions[other['id']]
+            ow, oh = layout.get_table_size(other)
+            assert x + w <= ox or ox + ow <= x or y + h <= oy or oy + oh <= y
+    (a1, b1, c1, d1), (a2, b2, c2, d2) = boxes.values()
+    assert c1 <= a2 or c2 <= a1 or d1 <= b2 or d2 <= b1  # app blocks don't overlap
@@ -0,0 +1,76 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from django_dia import diagram, merge, utils
+from test_project.anyapp import models as anyapp_models
+
+
+def test_merge_projects(all_data):
+    tables, rels = all_data
+    other_tables, other_rels = diagram.prepare_data(
+        utils.get_full_model_list(utils.get_target_apps(('anyapp', ))), inheritance=True, seed=1)
+    other_tables.append(dict(other_tables[0], id=1000, name='Extra', label='anyapp.Extra', db_table='extra'))
+
+    mtables, mrels = merge.merge_projects([('a', tables, rels), ('b', other_tables, other_rels)])
+    assert len(mtables) == len(tables) + 1
+    assert len(mrels) == len(rels)
+    ids = [t['id'] for t in mtables] + [r['id'] for r in mrels]
+    assert len(ids) == len(set(ids))
+    shop = [t for t in mtables if t['name'] == 'Shop']
+    assert len(shop) == 1 and shop[0]['projects'] == ['a', 'b']
+    assert shop[0]['label'] == 'a:anyapp.Shop'
+    assert len([t for t in mtables if t['db_table'] == 'anyapp_shop']) == 2  # with proxy model
+    labels = [t['label'] for t in mtables]
+    assert len(labels) == len(set(labels))
+    assert 'b:anyapp.Extra' in labels
+
+
+def test_merge_projects_shared_table():
+    tables, rels = diagram.prepare_data([anyapp_models.Post, anyapp_models.Comment], seed=0)
+    other_tables, other_rels = diagram.prepare_data([anyapp_models.Post, anyapp_models.Comment], seed=0)
+    # same table mapped by another model class, with an extra field before the foreign key
+    comment = next(t for t in other_tables if t['name'] == 'Comment')
+    comment.update(name='Reply', label='anyapp.Reply')
+    comment['fields'].insert(1, dict(comment['fields'][1], name='rating'))
+    for r in other_rels:
+        r['start_port'] = diagram.get_field_port([f['name'] for f in comment['fields']].index(r['start_field_name']))
+
+    mtables, mrels = merge.merge_projects([('a', tables, rels), ('b', other_tables, other_rels)])
+    assert len(mtables) == 2
+    merged = next(t for t in mtables if t['db_table'] == comment['db_table'])
+    assert merged['label'] == 'a:anyapp.Comment'
+    assert merged['projects'] == ['a', 'b']
+    names = [f['name'] for f in merged['fields']]
+    assert names[-1] == 'rating' and len(names) == len(set(names))
+    assert len(mrels) == len(rels)
+    for r in mrels:
+        assert r['start_port'] == diagram.get_field_port(names.index(r['start_field_name']))
+
+
+def test_collect_projects():
+    data = merge.collect_projects(['test_project.settings'], appnames=['anyapp'], seed=0)
+    assert len(data) == 1
+    settings, tables, rels = data[0]
+    assert settings == 'test_project.settings'
+    assert {t['app_label'] for t in tables} == {'anyapp'}
+
+    data = merge.collect_projects(['test_project.settings'] * 2, jobs=1, appnames=['anyapp'], seed=0)
+    (_, first, _), (_, second, _) = data
+    assert first[0]['pos'] == tables[0]['pos']
+    assert first[0]['pos'] != second[0]['pos']
+
+    dropped = []
+    merge.collect_projects(['test_project.settings'], appnames=['anyapp'], exclude_models={'anyapp.Post'},
+                           missing=diagram.MISSING_REPORT, dropped=dropped)
+    assert dropped and all(d['start'].startswith('test_project.settings:anyapp.') for d in dropped)
+    assert {d['target'] for d in dropped} == {'anyapp.Post'}
+
+
+def test_command_projects():
+    out = StringIO()
+    call_command('make_diagram', all_applications=True, pretend=True, stdout=out,
+                 projects=['test_project.settings', 'test_project.settings'])
+    lines = out.getvalue().splitlines()
+    assert 'test_project.settings:anyapp.Shop' in lines
+    assert len(lines) == len(set(lines))
@@ -0,0 +1,47 @@
+import pytest
+
+from django_dia import partitions
+
+
+@pytest.fixture
+def two_clusters(make_table, make_fk):
+    # two dense groups 0-4 and 5-9 joined by one relation, table 4 is in the "wrong" app
+    tables = [make_table(i, 'a' if i < 4 else 'b') for i in range(10)]
+    rels = [make_fk(i, j) for i in range(5) for j in range(i + 1, 5)]
+    rels += [make_fk(i, j) for i in range(5, 10) for j in range(i + 1, 10)]
+    rels.append(make_fk(4, 5))
+    return tables, rels
+
+
+def test_suggest_partitions(two_clusters):
+    tables, rels = two_clusters
+    for start in (partitions.START_COMMUNITIES, partitions.START_APPS):
+        assignment = partitions.suggest_partitions(tables, rels, 2, start=start)
+        assert len(set(assignment.values())) == 2
+        assert len({assignment[i] for i in range(5)}) == 1
+        assert len({assignment[i] for i in range(5, 10)}) == 1
+        assert partitions.get_cross_relations(rels, assignment) == [rels[-1]]
+
+
+def test_split_and_merge_to_k(two_clusters):
+    tables, rels = two_clusters
+    assignment = partitions.suggest_partitions(tables, rels, 4)
+    assert len(set(assignment.values())) == 4
+    assignment = partitions.suggest_partitions(tables, rels, 1)
+    assert set(assignment.values()) == {0}
+
+
+def test_suggest_partitions_invalid_k(two_clusters):
+    tables, rels = two_clusters
+    with pytest.raises(ValueError):
+        partitions.suggest_partitions(tables, rels, 0)
+
+
+def test_apply_partition_colors(two_clusters):
+    tables, rels = two_clusters
+    assignment = partitions.suggest_partitions(tables, rels, 2)
+    partitions.apply_partition_colors(tables, assignment)
+    assert tables[0]['color'] != tables[9]['color']
+    assert tables[0]['color'] == tables[1]['color']
+    lines = list(partitions.report_lines(tables, rels, assignment))
+    assert 'Cross-partition relations: 1' in lines
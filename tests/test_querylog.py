@@ -0,0 +1,105 @@
+from io import StringIO
+
+from django_dia import querylog, diagram
+from test_project.anyapp import models as anyapp_models
+
+
+LOG = '''# Time: 2020-01-01T00:00:00
+SELECT "anyapp_comment"."id" FROM "anyapp_comment"
+  INNER JOIN "anyapp_post" ON ("anyapp_comment"."post_id" = "anyapp_post"."id");
+SELECT * FROM anyapp_post WHERE id = 1
+SELECT * FROM anyapp_speaker INNER JOIN anyapp_speaker_language ON (x = y)
+
+-- comment
+SELECT * FROM anyapp_category T1 INNER JOIN anyapp_category T2 ON (T1.parent_id = T2.id);
+UPDATE anyapp_postponed SET a = 1;
+'''
+
+
+def test_iter_statements():
+    statements = list(querylog.iter_statements(StringIO(LOG)))
+    assert len(statements) == 5
+    assert 'INNER JOIN "anyapp_post"' in statements[0]
+
+
+def test_iter_statements_subquery():
+    statements = list(querylog.iter_statements(StringIO(
+        'SELECT * FROM anyapp_post WHERE id IN (\n'
+        '    SELECT post_id FROM anyapp_comment\n'
+        ')\n'
+        'SELECT 1\n'
+    )))
+    assert len(statements) == 2
+    assert 'anyapp_comment' in statements[0]
+
+
+def test_iter_statements_postgres():
+    statements = list(querylog.iter_statements(StringIO(
+        '2020-01-01 00:00:00 UTC [42] LOG:  statement: SELECT * FROM anyapp_post\n'
+        '2020-01-01 00:00:00 UTC [42] LOG:  duration: 0.5 ms  statement: SELECT * FROM anyapp_comment\n'
+        '\tWHERE id = 1\n'
+        '2020-01-01 00:00:00 UTC [42] LOG:  duration: 0.1 ms\n'
+        '2020-01-01 00:00:00 UTC [42] LOG:  execute <unnamed>: SELECT * FROM anyapp_speaker\n'
+        '2020-01-01 00:00:00 UTC [42] DETAIL:  parameters: $1 = \'anyapp_post\'\n'
+    )))
+    assert statements == [
+        'SELECT * FROM anyapp_post\n',
+        'SELECT * FROM anyapp_comment\n\tWHERE id = 1\n',
+        'SELECT * FROM anyapp_speaker\n',
+    ]
+    stats = querylog.collect_query_stats(StringIO(''.join(statements)), ['anyapp_post', 'anyapp_comment'])
+    assert stats.get_pair('anyapp_post', 'anyapp_comment') == 0
+
+
+def test_iter_statements_connection_queries():
+    statements = list(querylog.iter_statements(StringIO(
+        '{\'sql\': \'SELECT * FROM "anyapp_post"\', \'time\': \'0.001\'}\n'
+        '{\'sql\': \'SELECT * FROM "anyapp_comment"\', \'time\': \'0.002\'},\n'
+    )))
+    assert statements == ['SELECT * FROM "anyapp_post"\n', 'SELECT * FROM "anyapp_comment"\n']
+
+
+def test_table_matcher():
+    m = querylog.TableMatcher(['anyapp_post', 'anyapp_speaker', 'anyapp_speaker_language'])
+    assert m.findall('SELECT * FROM "ANYAPP_POST", anyapp_postponed') == ['anyapp_post']
+    assert m.findall('FROM anyapp_speaker JOIN anyapp_speaker_language') == [
+        'anyapp_speaker', 'anyapp_speaker_language']
+    assert querylog.TableMatcher([]).findall('SELECT 1') == []
+
+
+def test_find_join_pairs():
+    m = querylog.TableMatcher(['a', 'b', 'c', 'd'])
+    # only tables compared in ON, not every table of the statement
+    assert m.find_join_pairs(
+        'SELECT * FROM "a" INNER JOIN "b" ON ("a"."id" = "b"."a_id") LEFT OUTER JOIN "c" ON ("b"."id" = "c"."b_id") '
+        'WHERE "a"."x" IN (SELECT "d"."x" FROM "d")') == [('a', 'b'), ('b', 'c')]
+    assert m.find_join_pairs('SELECT * FROM a AS t1 JOIN a t2 ON t1.parent_id = t2.id') == [('a', 'a')]
+    assert m.find_join_pairs('SELECT * FROM public.c JOIN b USING (id)') == [('b', 'c')]
+    assert m.find_join_pairs('SELECT * FROM a WHERE id IN (SELECT a_id FROM b)') == []
+
+
+def test_collect_query_stats():
+    stats = querylog.collect_query_stats(StringIO(LOG), [
+        'anyapp_post', 'anyapp_comment', 'anyapp_speaker', 'anyapp_speaker_language', 'anyapp_category'])
+    assert stats.tables['anyapp_post'] == 2
+    assert stats.tables['anyapp_comment'] == 1
+    assert stats.get_pair('anyapp_post', 'anyapp_comment') == 1
+    assert stats.get_pair('anyapp_comment', 'anyapp_post') == 1
+    assert stats.get_pair('anyapp_category', 'anyapp_category') == 1
+    assert stats.get_pair('anyapp_post', 'anyapp_speaker') == 0
+
+
+def test_apply_query_stats():
+    tables, rels = diagram.prepare_data([
+        anyapp_models.Post, anyapp_models.Comment, anyapp_models.Speaker,
+        anyapp_models.Language, anyapp_models.Person,
+    ])
+    assert 'anyapp_speaker_language' in querylog.get_known_tables(tables, rels)
+    stats = querylog.collect_query_stats(StringIO(LOG), querylog.get_known_tables(tables, rels))
+    querylog.apply_query_stats(tables, rels, stats)
+
+    colors = {t['name']: t['color'] for t in tables}
+    assert colors['Person'] == querylog.COLD_COLOR
+    assert colors['Post'] != querylog.COLD_COLOR
+    for r in rels:
+        assert r['line_width'] > 0.1
@@ -0,0 +1,43 @@
+from django_dia import diagram, storage
+from test_project.anyapp import models as anyapp_models
+
+
+def field(db_type, **kwargs):
+    return dict({'db_type': db_type, 'nullable': False, 'max_length': None, 'max_digits': None}, **kwargs)
+
+
+def test_estimate_field_size():
+    f = storage.estimate_field_size
+    assert f(field(None)) == 0
+    assert f(field('integer')) == 4
+    assert f(field('bigint')) == 8
+    assert f(field('bigint', nullable=True)) == 8 + storage.NULL_BITMAP
+    assert f(field('varchar(100)', max_length=100)) == storage.VARLENA_HEADER + 50
+    assert f(field('text')) == storage.TEXT_SIZE
+    assert f(field('jsonb')) == storage.TEXT_SIZE
+    assert f(field('decimal', max_digits=10)) == storage.VARLENA_HEADER + 5
+    assert f(field('decimal', max_digits=10, decimal_places=3)) == storage.VARLENA_HEADER + 4 + 2
+    assert f(field('numeric(10, 3)', max_digits=10, decimal_places=3)) == storage.VARLENA_HEADER + 4 + 2
+    assert f(field('datetime')) == 8
+    assert f(field('date')) == 4
+    assert f(field('interval')) == 16
+    assert f(field('time')) == 8
+    assert f(field('int(11)')) == 4
+    assert f(field('integer unsigned CHECK ("context" >= 0)')) == 4
+    assert f(field('smallint')) == 2
+    assert f(field('double precision')) == 8
+    assert f(field('bool')) == 1
+    assert f(field('something')) == storage.DEFAULT_SIZE
+
+
+def test_apply_row_width():
+    tables, rels = diagram.prepare_data([anyapp_models.Person, anyapp_models.Post, anyapp_models.Engine], seed=0)
+    report = storage.apply_row_width(tables, wide_row_bytes=200)
+    assert [table['name'] for width, table, widest in report] == ['Post', 'Engine', 'Person']
+    post = report[0][1]
+    assert post['row_width'] == 4 + storage.TEXT_SIZE
+    assert post['color'] == storage.WIDE_ROW_COLOR
+    assert report[0][2] == 'content'
+    assert report[1][1]['color'] != storage.WIDE_ROW_COLOR
+    assert post['fields'][1]['type'] == 'TextField ~256B'
+    assert len(list(storage.report_lines(report))) == 3
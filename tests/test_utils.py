@@ -74,6 +74,10 @@ def test_prepare_model_fields_Person():
             'primary_key': True,
             'nullable': False,
             'unique': True,
+            'db_type': 'integer',
+            'max_length': None,
+            'max_digits': None,
+            'decimal_places': None,
         },
         {
             'name': 'first_name',
@@ -82,6 +86,10 @@ def test_prepare_model_fields_Person():
             'primary_key': False,
             'nullable': False,
             'unique': False,
+            'db_type': 'varchar(30)',
+            'max_length': 30,
+            'max_digits': None,
+            'decimal_places': None,
         },
         {
             'name': 'last_name',
@@ -90,6 +98,10 @@ def test_prepare_model_fields_Person():
             'primary_key': False,
             'nullable': False,
             'unique': False,
+            'db_type': 'varchar(30)',
+            'max_length': 30,
+            'max_digits': None,
+            'decimal_places': None,
         },
     ]
 
@@ -105,6 +117,10 @@ def test_prepare_model_fields_AbstractShape():
             'primary_key': False,
             'nullable': False,
             'unique': False,
+            'db_type': 'real',
+            'max_length': None,
+            'max_digits': None,
+            'decimal_places': None,
         },
     ]
 
@@ -119,6 +135,7 @@ def test_relations_1_n():
             'end_obj': anyapp_models.Post,
             'start_field': utils.get_model_field_by_name(anyapp_models.Comment, 'post'),
             'end_field': utils.get_model_pk_field(anyapp_models.Post),
+            'on_delete': 'CASCADE',
             'color': AnyValue(),
             'dotted': False,
             'directional': True,
@@ -139,6 +156,7 @@ def test_relations_1_1():
             'end_obj': anyapp_models.Automobile,
             'start_field': utils.get_model_field_by_name(anyapp_models.Engine, 'automobile'),
             'end_field': utils.get_model_pk_field(anyapp_models.Automobile),
+            'on_delete': 'CASCADE',
             'color': AnyValue(),
             'dotted': False,
             'directional': False,
@@ -162,6 +180,7 @@ def test_relations_n_n():
             'end_obj': anyapp_models.Language,
             'start_field': utils.get_model_field_by_name(anyapp_models.Speaker, 'language'),
             'end_field': utils.get_model_pk_field(anyapp_models.Language),
+            'on_delete': None,
             'color': AnyValue(),
             'dotted': False,
             'directional': False,
@@ -182,6 +201,7 @@ def test_self_referencing_1_n():
             'end_obj': anyapp_models.Category,
             'start_field': utils.get_model_field_by_name(anyapp_models.Category, 'parent'),
             'end_field': utils.get_model_pk_field(anyapp_models.Category),
+            'on_delete': 'CASCADE',
             'color': AnyValue(),
             'dotted': False,
             'directional': True,
@@ -199,6 +219,7 @@ def test_self_referencing_n_n():
             'end_obj': anyapp_models.Friend,
             'start_field': utils.get_model_field_by_name(anyapp_models.Friend, 'friends'),
             'end_field': utils.get_model_pk_field(anyapp_models.Friend),
+            'on_delete': None,
             'color': AnyValue(),
             'dotted': False,
             'directional': False,
@@ -226,6 +247,7 @@ def test_relations_n_n_through():
             'end_obj': anyapp_models.Poster,
             'start_field': utils.get_model_field_by_name(anyapp_models.Like, 'poster'),
             'end_field': utils.get_model_pk_field(anyapp_models.Poster),
+            'on_delete': 'CASCADE',
             'color': AnyValue(),
             'dotted': False,
             'directional': True,
@@ -237,6 +259,7 @@ def test_relations_n_n_through():
             'end_obj': anyapp_models.Picture,
             'start_field': utils.get_model_field_by_name(anyapp_models.Like, 'picture'),
             'end_field': utils.get_model_pk_field(anyapp_models.Picture),
+            'on_delete': 'CASCADE',
             'color': AnyValue(),
             'dotted': False,
             'directional': True,
@@ -250,6 +273,7 @@ def test_relation_from_abstract_model():
         'end_label': '1',
         'end_obj': anyapp_models.Shop,
         'end_field': utils.get_model_pk_field(anyapp_models.Shop),
+        'on_delete': 'CASCADE',
         'color': AnyValue(),
         'dotted': False,
         'directional': True,
@@ -281,6 +305,7 @@ def test_prepare_model_inheritance():
         {
             'start_label': '',
             'end_label': 'multi-table',
+            'on_delete': 'CASCADE',
             'start_obj': anyapp_models.Dog,
             'end_obj': anyapp_models.Pet,
             'dotted': True,
@@ -294,6 +319,7 @@ def test_prepare_model_inheritance():
         {
             'start_label': '',
             'end_label': 'abstract',
+            'on_delete': None,
             'start_obj': anyapp_models.Circle,
             'end_obj': anyapp_models.AbstractShape,
             'dotted': True,
@@ -307,6 +333,7 @@ def test_prepare_model_inheritance():
         {
             'start_label': '',
             'end_label': 'proxy',
+            'on_delete': None,
             'start_obj': anyapp_models.ProxyShop,
             'end_obj': anyapp_models.Shop,
             'dotted': True,
@@ -317,3 +344,10 @@ def test_prepare_model_inheritance():
 
     data = f(anyapp_models.Engine)
     assert data == []
+
+
+def test_get_reference_label():
+    assert utils.get_reference_label(anyapp_models.Post, anyapp_models.Comment) == 'anyapp.Post'
+    assert utils.get_reference_label('self', anyapp_models.Category) == 'anyapp.Category'
+    assert utils.get_reference_label('Poster', anyapp_models.Like) == 'anyapp.Poster'
+    assert utils.get_reference_label('otherapp.Thing', anyapp_models.Like) == 'otherapp.Thing'